@@ -0,0 +1,79 @@
+"""
+Checkpoints do Pipeline em Lote
+Resultado de cada etapa gravado em Parquet para retomar execuções interrompidas
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import numpy as np
+
+# Etapas do pipeline em lote, na ordem de execução (checkpoints e resume_from)
+ETL_STAGES = ('extract', 'validate', 'transform', 'load')
+
+class CheckpointStore:
+    """
+    Checkpoints das etapas extract, validate e transform em um diretório.
+    
+    O manifesto registra as etapas gravadas e a assinatura da entrada que as
+    produziu; checkpoints de outra entrada não são reaproveitados. Os hashes
+    pendentes do índice de deduplicação acompanham o checkpoint da transformação.
+    """
+    
+    def __init__(self, directory):
+        self.directory = Path(directory)
+    
+    def save(self, stage, frame, input_signature, pending_hashes=None):
+        """Grava o resultado da etapa e o registra no manifesto"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        frame.to_parquet(self.directory / f"{stage}.parquet", index=False)
+        if pending_hashes is not None:
+            np.save(self.directory / "dedup_pendentes.npy", pending_hashes)
+        
+        # A extração inicia um novo manifesto
+        manifest = self._read_manifest() if stage != 'extract' else None
+        if manifest is None:
+            manifest = {'input_signature': input_signature, 'stages': {}}
+        manifest['stages'][stage] = {'rows': len(frame), 'created_at': datetime.now().isoformat()}
+        
+        with open(self.directory / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+    
+    def completed_stages(self, input_signature):
+        """
+        Quantidade de etapas consecutivas com checkpoint desde a extração, ou
+        None se não houver manifesto para a entrada atual.
+        """
+        manifest = self._read_manifest()
+        if manifest is None or manifest['input_signature'] != input_signature:
+            return None
+        
+        completed = 0
+        while completed < len(ETL_STAGES) - 1 and ETL_STAGES[completed] in manifest['stages']:
+            completed += 1
+        return completed
+    
+    def load(self, stage):
+        """DataFrame gravado pela etapa e hashes pendentes (None se ausentes)"""
+        frame = pd.read_parquet(self.directory / f"{stage}.parquet")
+        pending_file = self.directory / "dedup_pendentes.npy"
+        pending_hashes = np.load(pending_file) if stage == 'transform' and pending_file.exists() else None
+        return frame, pending_hashes
+    
+    def clear(self):
+        """Remove os checkpoints após uma execução concluída"""
+        if not self.directory.exists():
+            return
+        for checkpoint_file in self.directory.glob("*"):
+            if checkpoint_file.suffix in ('.parquet', '.npy', '.json'):
+                checkpoint_file.unlink()
+    
+    def _read_manifest(self):
+        manifest_file = self.directory / "manifest.json"
+        if not manifest_file.exists():
+            return None
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
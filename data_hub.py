@@ -0,0 +1,161 @@
+"""
+Registro de Datasets em Processo
+Cada fonte é lida uma única vez e compartilhada por ETL, automação Excel e relatórios
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import pandas as pd
+import openpyxl
+from excel_reader import read_excel, read_csv, _typed_column
+
+def write_arrow_file(df, path):
+    """Grava um DataFrame (com índice) como arquivo Arrow IPC"""
+    import pyarrow as pa
+    
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def read_arrow_file(path):
+    """Lê um arquivo Arrow IPC por mapeamento de memória"""
+    import pyarrow as pa
+    
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+class DataHub:
+    """
+    Registro de datasets compartilhado pelos pipelines de um mesmo processo.
+    
+    get() lê a fonte (planilha ou CSV) na primeira vez e devolve aos consumidores
+    seguintes visões do mesmo DataFrame: projeções por coluna e cópias rasas, que
+    com Copy-on-Write não copiam dados até alguém alterá-los. A fonte é relida
+    apenas se o arquivo mudar. Para outros processos, share() grava o dataset
+    uma vez em Arrow IPC, lido por mapeamento de memória (read_arrow_file).
+    Colunas convertidas por esquema também são guardadas por versão da fonte.
+    """
+    
+    def __init__(self, engine='auto', spill_dir=None):
+        self.engine = engine
+        self.spill_dir = spill_dir
+        self.loads = {}
+        self._frames = {}
+        self._typed = {}
+        self._sheet_names = {}
+        self._shared = {}
+        self._lock = threading.Lock()
+        self._temp_dir = None
+    
+    def get(self, path, sheet_name=0, usecols=None, schema=None):
+        """
+        Visão do dataset: apenas as colunas de usecols (nomes ausentes são
+        ignorados) e, com schema, colunas convertidas para os tipos do esquema.
+        """
+        key, stamp, frame = self._load(path, sheet_name)
+        if usecols is not None:
+            wanted = set(usecols)
+            view = frame[[col for col in frame.columns if col in wanted]]
+        else:
+            view = frame.copy(deep=not _copy_on_write_enabled())
+        
+        if schema:
+            view = self._apply_schema(key, stamp, view, schema)
+        return view
+    
+    def share(self, path, sheet_name=0):
+        """Caminho de um arquivo Arrow IPC com o dataset, para leitura em outros processos"""
+        key, stamp, frame = self._load(path, sheet_name)
+        
+        with self._lock:
+            shared_stamp, arrow_path = self._shared.get(key, (None, None))
+            if shared_stamp != stamp:
+                if self._temp_dir is None:
+                    self._temp_dir = tempfile.mkdtemp(prefix='etl_hub_', dir=self.spill_dir)
+                arrow_path = os.path.join(self._temp_dir, f"dataset_{len(self._shared)}.arrow")
+                write_arrow_file(frame, arrow_path)
+                self._shared[key] = (stamp, arrow_path)
+        return arrow_path
+    
+    def close(self):
+        """Libera os datasets e remove os arquivos compartilhados"""
+        with self._lock:
+            self._frames.clear()
+            self._typed.clear()
+            self._sheet_names.clear()
+            self._shared.clear()
+            if self._temp_dir is not None:
+                shutil.rmtree(self._temp_dir, ignore_errors=True)
+                self._temp_dir = None
+    
+    def _load(self, path, sheet_name):
+        """Entrada do registro: (chave, versão do arquivo, DataFrame)"""
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        
+        # O lock garante uma única leitura mesmo com consumidores em threads
+        with self._lock:
+            key = self._key(path, sheet_name, stamp)
+            cached = self._frames.get(key)
+            if cached is not None and cached[0] == stamp:
+                logging.info(f"Dataset reutilizado do registro: {path}")
+                return key, stamp, cached[1]
+            
+            if path.lower().endswith('.csv'):
+                frame = read_csv(path)
+            else:
+                frame = read_excel(path, sheet_name=sheet_name, engine=self.engine)
+            
+            self._frames[key] = (stamp, frame)
+            self._typed[key] = (stamp, {})
+            self.loads[key] = self.loads.get(key, 0) + 1
+            logging.info(f"Dataset carregado no registro: {path} ({len(frame)} registros)")
+            return key, stamp, frame
+    
+    def _key(self, path, sheet_name, stamp):
+        realpath = os.path.realpath(path)
+        if path.lower().endswith('.csv'):
+            return (realpath, None)
+        
+        # Índice e nome da mesma aba compartilham a entrada; a lista de abas
+        # é lida uma vez por versão do arquivo
+        if isinstance(sheet_name, int):
+            cached = self._sheet_names.get(realpath)
+            if cached is None or cached[0] != stamp:
+                workbook = openpyxl.load_workbook(path, read_only=True)
+                try:
+                    cached = (stamp, workbook.sheetnames)
+                finally:
+                    workbook.close()
+                self._sheet_names[realpath] = cached
+            sheet_name = cached[1][sheet_name]
+        return (realpath, sheet_name)
+    
+    def _apply_schema(self, key, stamp, view, schema):
+        """apply_schema reaproveitando as colunas já convertidas desta versão da fonte"""
+        converted = {}
+        with self._lock:
+            typed_stamp, typed = self._typed.get(key, (None, None))
+            if typed_stamp != stamp:
+                typed = {}
+            
+            for col in view.columns:
+                spec = schema['columns'].get(col)
+                if spec and str(view[col].dtype) != spec['dtype']:
+                    spec_key = (col, json.dumps(spec, sort_keys=True))
+                    if spec_key not in typed:
+                        typed[spec_key] = _typed_column(view[col], spec).set_axis(view.index)
+                    converted[col] = typed[spec_key]
+        return view.assign(**converted) if converted else view
+
+def _copy_on_write_enabled():
+    """Visões rasas só são seguras com Copy-on-Write (padrão a partir do pandas 3)"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    return bool(pd.get_option('mode.copy_on_write'))
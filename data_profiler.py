@@ -0,0 +1,336 @@
+"""
+Perfilador de Qualidade de Dados em Streaming
+Estatísticas aproximadas e combináveis por bloco (HyperLogLog e sketch de quantis)
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import pandas as pd
+import numpy as np
+
+class HyperLogLog:
+    """
+    Contagem aproximada de valores distintos (HyperLogLog com modo esparso).
+    
+    Enquanto houver poucos valores distintos os hashes são guardados de forma
+    exata; acima de sparse_limit passam a alimentar os registradores.
+    """
+    
+    def __init__(self, precision=14, sparse_limit=4096):
+        self.precision = precision
+        self.sparse_limit = sparse_limit
+        self.registers = None
+        self.hashes = np.empty(0, dtype=np.uint64)
+    
+    def update(self, hashes):
+        """Adiciona hashes de 64 bits (ex.: pd.util.hash_pandas_object)"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        
+        if self.registers is None:
+            self.hashes = np.union1d(self.hashes, hashes)
+            if len(self.hashes) > self.sparse_limit:
+                self._to_dense()
+            return
+        
+        self._add_to_registers(hashes)
+    
+    def merge(self, other):
+        """Combina outro HyperLogLog de mesma precisão"""
+        if other.registers is None:
+            self.update(other.hashes)
+            return self
+        
+        if self.registers is None:
+            self._to_dense()
+        self.registers = np.maximum(self.registers, other.registers)
+        return self
+    
+    def count(self):
+        """Estimativa do número de valores distintos"""
+        if self.registers is None:
+            return len(self.hashes)
+        
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(float)))
+        
+        # Correção para cardinalidades pequenas (contagem linear)
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        
+        return int(round(estimate))
+    
+    def _to_dense(self):
+        self.registers = np.zeros(2 ** self.precision, dtype=np.uint8)
+        self._add_to_registers(self.hashes)
+        self.hashes = np.empty(0, dtype=np.uint64)
+    
+    def _add_to_registers(self, hashes):
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        remainder = hashes << np.uint64(p)
+        
+        # Posição do primeiro bit 1 nos bits restantes
+        rank = np.full(len(hashes), 64 - p + 1, dtype=np.uint8)
+        nonzero = remainder != 0
+        rank[nonzero] = (64 - np.floor(np.log2(remainder[nonzero].astype(float)))).astype(np.uint8)
+        
+        np.maximum.at(self.registers, index, rank)
+
+class QuantileSketch:
+    """
+    Sketch de quantis combinável no estilo KLL (compactadores por nível).
+    
+    Até `capacity` valores o sketch é exato; depois cada nível cheio é ordenado
+    e metade dos valores sobe para o nível seguinte com o dobro do peso.
+    """
+    
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self._offset = 0
+    
+    def update(self, values):
+        """Adiciona valores numéricos (sem nulos)"""
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=float)])
+        self._compress()
+    
+    def merge(self, other):
+        """Combina outro sketch nível a nível"""
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self._compress()
+        return self
+    
+    def quantiles(self, probabilities):
+        """Quantis aproximados (exatos, com interpolação linear, antes de compactar)"""
+        if len(self.levels) == 1:
+            if len(self.levels[0]) == 0:
+                return [np.nan] * len(probabilities)
+            return list(np.quantile(self.levels[0], probabilities))
+        
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2.0 ** level) for level, v in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, cumulative = values[order], np.cumsum(weights[order])
+        
+        targets = np.asarray(probabilities) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(values) - 1)
+        return list(values[positions])
+    
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self.capacity:
+                values = np.sort(values)
+                carry = values[-1:] if len(values) % 2 else values[:0]
+                values = values[:len(values) - len(carry)]
+                
+                # Alterna o deslocamento para não enviesar os quantis
+                promoted = values[self._offset::2]
+                self._offset = 1 - self._offset
+                
+                self.levels[level] = carry
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+class ColumnProfile:
+    """Perfil combinável de uma coluna: nulos, distintos e estatísticas numéricas"""
+    
+    def __init__(self):
+        self.dtype = None
+        self.kind = None
+        self.null_count = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog()
+        self.sketch = QuantileSketch()
+    
+    def update(self, series):
+        """Atualiza o perfil com um bloco da coluna"""
+        self.dtype = str(series.dtype)
+        nulls = series.isna()
+        self.null_count += int(nulls.sum())
+        self.distinct.update(pd.util.hash_pandas_object(series, index=False).to_numpy())
+        
+        if pd.api.types.is_datetime64_any_dtype(series):
+            self.kind = 'datetime'
+            values = series[~nulls].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            self.kind = 'numeric'
+            values = series[~nulls].to_numpy(dtype=float)
+        else:
+            return
+        
+        if len(values):
+            self._update_moments(values)
+            self.sketch.update(values)
+    
+    def merge(self, other):
+        """Combina o perfil de outro bloco ou processo"""
+        self.dtype = self.dtype or other.dtype
+        self.kind = self.kind or other.kind
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+        return self
+    
+    def summary(self):
+        """Resumo no formato de DataFrame.describe()"""
+        q25, q50, q75 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        
+        if self.kind == 'datetime':
+            as_time = lambda value: pd.Timestamp(int(value))
+            return {
+                'count': float(self.count),
+                'mean': as_time(self.mean),
+                'std': np.nan,
+                'min': as_time(self.min),
+                '25%': as_time(q25),
+                '50%': as_time(q50),
+                '75%': as_time(q75),
+                'max': as_time(self.max)
+            }
+        
+        return {
+            'count': float(self.count),
+            'mean': self.mean,
+            'std': float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan,
+            'min': self.min,
+            '25%': q25,
+            '50%': q50,
+            '75%': q75,
+            'max': self.max
+        }
+    
+    def _update_moments(self, values):
+        self._combine(len(values), values.mean(), ((values - values.mean()) ** 2).sum(), values.min(), values.max())
+    
+    def _combine(self, count, mean, m2, minimum, maximum):
+        # Algoritmo paralelo de Chan para média e variância
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = minimum if self.min is None else min(self.min, minimum)
+        self.max = maximum if self.max is None else max(self.max, maximum)
+
+class DataProfile:
+    """
+    Perfil de qualidade de um DataFrame processado bloco a bloco.
+    
+    Perfis parciais de blocos ou processos diferentes são combinados com merge();
+    to_report() gera o mesmo esquema de data_quality_report.json. Por padrão a
+    memória não cresce com o número de linhas: as linhas distintas são estimadas
+    por HyperLogLog e duplicate_records fica nulo. Com exact_duplicates=True as
+    duplicatas são contadas de forma exata, guardando o hash de 64 bits de cada
+    linha distinta (8 bytes por linha).
+    """
+    
+    def __init__(self, exact_duplicates=False):
+        self.total_records = 0
+        self.memory_usage = 0
+        self.columns = {}
+        self.distinct_rows = HyperLogLog()
+        self.row_hashes = np.empty(0, dtype=np.uint64) if exact_duplicates else None
+    
+    @classmethod
+    def from_frame(cls, df, chunk_size=100000, exact_duplicates=False):
+        """Perfil de um DataFrame inteiro, calculado em blocos"""
+        profile = cls(exact_duplicates)
+        for start in range(0, len(df), chunk_size):
+            profile.update(df.iloc[start:start + chunk_size])
+        return profile
+    
+    def update(self, df):
+        """Atualiza o perfil com um bloco"""
+        self.total_records += len(df)
+        self.memory_usage += _estimate_memory(df)
+        
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        self.distinct_rows.update(hashes)
+        if self.row_hashes is not None:
+            self.row_hashes = _merge_unique(self.row_hashes, hashes)
+        
+        for col in df.columns:
+            self.columns.setdefault(col, ColumnProfile()).update(df[col])
+    
+    def merge(self, other):
+        """Combina outro perfil parcial"""
+        self.total_records += other.total_records
+        self.memory_usage += other.memory_usage
+        self.distinct_rows.merge(other.distinct_rows)
+        
+        # A contagem exata só se mantém se os dois perfis a tiverem
+        if self.row_hashes is not None and other.row_hashes is not None:
+            self.row_hashes = _merge_unique(self.row_hashes, other.row_hashes)
+        else:
+            self.row_hashes = None
+        
+        for col, column_profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(column_profile)
+            else:
+                self.columns[col] = column_profile
+        return self
+    
+    def to_report(self):
+        """Relatório no esquema de data_quality_report.json (campos aproximados listados em 'approximate')"""
+        approximate = ['distinct_values', 'numeric_summary']
+        if self.row_hashes is not None:
+            distinct_records = len(self.row_hashes)
+            duplicate_records = self.total_records - distinct_records
+        else:
+            # Estimativa sem contagem exata: subtraí-la do total geraria duplicatas fictícias
+            distinct_records = min(self.distinct_rows.count(), self.total_records)
+            duplicate_records = None
+            approximate.append('distinct_records')
+        
+        return {
+            'total_records': self.total_records,
+            'columns': list(self.columns),
+            'data_types': {col: p.dtype for col, p in self.columns.items()},
+            'null_values': {col: p.null_count for col, p in self.columns.items()},
+            'duplicate_records': duplicate_records,
+            'distinct_records': distinct_records,
+            'memory_usage': int(self.memory_usage),
+            'numeric_summary': {
+                col: p.summary() for col, p in self.columns.items() if p.kind and p.count
+            },
+            'distinct_values': {col: p.distinct.count() for col, p in self.columns.items()},
+            'approximate': approximate
+        }
+
+def _merge_unique(sorted_unique, hashes):
+    """Insere em sorted_unique (ordenado, sem repetição) apenas os hashes ausentes, sem reordenar o conjunto"""
+    new = np.unique(np.asarray(hashes, dtype=np.uint64))
+    positions = np.searchsorted(sorted_unique, new)
+    present = positions < len(sorted_unique)
+    present[present] = sorted_unique[positions[present]] == new[present]
+    return np.insert(sorted_unique, positions[~present], new[~present])
+
+def _estimate_memory(df, sample_size=1000):
+    """Memória estimada: exata para colunas de tamanho fixo, por amostra para strings"""
+    shallow = df.memory_usage(index=False, deep=False)
+    object_columns = [col for col in df.columns if df[col].dtype == object or isinstance(df[col].dtype, pd.StringDtype)]
+    
+    if not object_columns or len(df) == 0:
+        return int(shallow.sum())
+    
+    sample = df[object_columns].head(sample_size)
+    scale = len(df) / len(sample)
+    deep_objects = sample.memory_usage(index=False, deep=True).sum() * scale
+    return int(shallow.drop(object_columns).sum() + deep_objects)
@@ -0,0 +1,99 @@
+"""
+Dimensão de Datas
+Tabela calendário pré-calculada, consultada por chave inteira de data
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import pandas as pd
+import numpy as np
+
+def build_date_dimension(start, end, fiscal_year_start_month=1, holidays=()):
+    """
+    Calendário diário entre start e end (inclusive).
+    
+    Data_Key é a chave inteira AAAAMMDD; o ano fiscal recebe o ano em que termina.
+    """
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq='D')
+    iso = dates.isocalendar()
+    month = dates.month
+    fiscal_period = (month - fiscal_year_start_month) % 12 + 1
+    holiday = dates.isin(pd.to_datetime(list(holidays)).normalize())
+    weekend = dates.dayofweek >= 5
+    
+    return pd.DataFrame({
+        'Data_Key': dates.year * 10000 + month * 100 + dates.day,
+        'Data': dates,
+        'Dia_Semana': dates.day_name(),
+        'Dia_Semana_Num': dates.dayofweek + 1,
+        'Semana_Ano': iso['week'].array,
+        'Ano_ISO': iso['year'].array,
+        'Mes': month,
+        'Nome_Mes': dates.month_name(),
+        'Ano': dates.year,
+        'Trimestre': dates.quarter,
+        'Periodo_Fiscal': fiscal_period,
+        'Trimestre_Fiscal': (fiscal_period - 1) // 3 + 1,
+        'Ano_Fiscal': dates.year + ((fiscal_year_start_month > 1) & (month >= fiscal_year_start_month)),
+        'Fim_De_Semana': weekend,
+        'Feriado': holiday,
+        'Dia_Util': ~weekend & ~holiday
+    })
+
+class DateDimension:
+    """
+    Dimensão de datas em cache, estendida sob demanda para cobrir os dados.
+    
+    A consulta converte cada data em dias desde a época e lê a linha da tabela
+    por posição; o trabalho de calendário fica restrito às datas da tabela.
+    """
+    
+    def __init__(self, fiscal_year_start_month=1, holidays=()):
+        self.fiscal_year_start_month = fiscal_year_start_month
+        self.holidays = tuple(holidays)
+        self.table = None
+        self._first_day = None
+    
+    def covering(self, start, end):
+        """Tabela que cobre o intervalo (reconstruída em anos completos se preciso)"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if self.table is None or start < self.table['Data'].iloc[0] or end > self.table['Data'].iloc[-1]:
+            if self.table is not None:
+                start = min(start, self.table['Data'].iloc[0])
+                end = max(end, self.table['Data'].iloc[-1])
+            self.table = build_date_dimension(
+                pd.Timestamp(year=start.year, month=1, day=1),
+                pd.Timestamp(year=end.year, month=12, day=31),
+                self.fiscal_year_start_month, self.holidays
+            )
+            self._first_day = _day_numbers(self.table['Data'])[0]
+        return self.table
+    
+    def lookup(self, dates, columns):
+        """Colunas da dimensão alinhadas às datas (NaT resulta em nulo)"""
+        dates = pd.Series(dates)
+        valid = dates.notna().to_numpy()
+        if not valid.any():
+            return pd.DataFrame({col: pd.Series(index=dates.index, dtype=object) for col in columns})
+        
+        table = self.covering(dates.min(), dates.max())
+        positions = np.where(valid, _day_numbers(dates.where(valid, table['Data'].iloc[0])) - self._first_day, 0)
+        
+        result = {}
+        for col in columns:
+            values = table[col].take(positions).set_axis(dates.index)
+            result[col] = values if valid.all() else values.where(valid)
+        return pd.DataFrame(result)
+    
+    def date_keys(self, dates):
+        """Chave inteira AAAAMMDD de cada data"""
+        return self.lookup(dates, ['Data_Key'])['Data_Key']
+
+def days_since(dates, reference=None):
+    """Dias inteiros entre cada data e a referência (hoje por padrão)"""
+    reference = pd.Timestamp.now() if reference is None else pd.Timestamp(reference)
+    return (reference - pd.Series(dates)).dt.days
+
+def _day_numbers(dates):
+    """Dias desde 1970-01-01 (chave contígua para acesso por posição)"""
+    return pd.Series(dates).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
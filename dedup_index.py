@@ -0,0 +1,163 @@
+"""
+Índice Persistente de Deduplicação
+Hashes de 64 bits por registro (ou por ID) com filtro de Bloom opcional
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import os
+import pandas as pd
+import numpy as np
+
+def row_hashes(df, key_columns=None):
+    """Hashes de 64 bits por linha, a partir das colunas-chave (ou da linha inteira)"""
+    if key_columns:
+        keys = df[list(key_columns)].astype(str)
+    else:
+        keys = df
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+class BloomFilter:
+    """
+    Filtro de Bloom vetorizado sobre hashes de 64 bits.
+    
+    As k posições de cada item vêm de hash duplo (metades alta e baixa do hash),
+    sem recalcular hashes por função.
+    """
+    
+    def __init__(self, expected_items=1000000, false_positive_rate=0.001):
+        expected_items = max(int(expected_items), 1)
+        self.num_bits = int(np.ceil(-expected_items * np.log(false_positive_rate) / np.log(2) ** 2))
+        self.num_hashes = max(int(round(self.num_bits / expected_items * np.log(2))), 1)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+    
+    def add(self, hashes):
+        """Marca os hashes no filtro"""
+        # Atribuição vetorizada sobre os bits desempacotados (ufunc.at é lento)
+        unpacked = np.unpackbits(self.bits, count=self.num_bits, bitorder='little')
+        for positions in self._positions(hashes):
+            unpacked[positions] = 1
+        self.bits = np.packbits(unpacked, bitorder='little')
+    
+    def might_contain(self, hashes):
+        """Máscara dos hashes possivelmente presentes (sem falsos negativos)"""
+        found = np.ones(len(hashes), dtype=bool)
+        for positions in self._positions(hashes):
+            found &= (self.bits[positions >> 3] >> (positions & 7)) & 1 == 1
+        return found
+    
+    def _positions(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        for i in range(self.num_hashes):
+            yield ((h1 + np.uint64(i) * h2) % np.uint64(self.num_bits)).astype(np.int64)
+
+class DedupIndex:
+    """
+    Índice de registros já carregados, persistido entre execuções.
+    
+    Os hashes ficam em um vetor ordenado (busca binária vetorizada); o filtro de
+    Bloom descarta a maior parte dos registros novos antes da busca. Os hashes
+    de uma execução só são gravados em save(), após a carga concluir.
+    """
+    
+    def __init__(self, path, key_columns=None, bloom_filter=True,
+                 expected_items=1000000, false_positive_rate=0.001):
+        self.path = path
+        self.key_columns = key_columns
+        self.use_bloom = bloom_filter
+        self.expected_items = expected_items
+        self.false_positive_rate = false_positive_rate
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.pending = np.empty(0, dtype=np.uint64)
+        self.bloom = None
+        self._load()
+    
+    def __len__(self):
+        return len(self.hashes) + len(self.pending)
+    
+    def filter_new(self, df):
+        """
+        Remove do bloco os registros já vistos (em execuções anteriores, em blocos
+        anteriores ou repetidos no próprio bloco) e registra os demais.
+        
+        Retorna (bloco filtrado, duplicatas internas, duplicatas já carregadas).
+        """
+        hashes = row_hashes(df, self.key_columns)
+        repeated = pd.Index(hashes).duplicated()
+        seen = self.contains(hashes)
+        keep = ~(repeated | seen)
+        
+        self._add(hashes[keep])
+        return df[keep], int((repeated & ~seen).sum()), int(seen.sum())
+    
+    def contains(self, hashes):
+        """Máscara dos hashes presentes no índice"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        candidates = self.bloom.might_contain(hashes) if self.bloom is not None else np.ones(len(hashes), dtype=bool)
+        
+        found = np.zeros(len(hashes), dtype=bool)
+        if candidates.any():
+            found[candidates] = _in_sorted(self.hashes, hashes[candidates]) | _in_sorted(self.pending, hashes[candidates])
+        return found
+    
+    def restore_pending(self, hashes):
+        """Registra hashes pendentes salvos em checkpoint (no vetor e no filtro de Bloom)"""
+        self._add(np.asarray(hashes, dtype=np.uint64))
+    
+    def save(self):
+        """Incorpora os hashes da execução e grava o índice"""
+        self.hashes = _sorted_union(self.hashes, self.pending)
+        self.pending = np.empty(0, dtype=np.uint64)
+        
+        # Filtro cheio: redimensiona para manter a taxa de falsos positivos
+        if self.use_bloom and len(self.hashes) > self.expected_items:
+            self.expected_items = 2 * len(self.hashes)
+            self._build_bloom()
+        
+        temp_path = f"{self.path}.tmp.npz"
+        arrays = {'hashes': self.hashes, 'expected_items': np.array(self.expected_items)}
+        if self.bloom is not None:
+            arrays['bloom_bits'] = self.bloom.bits
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, self.path)
+    
+    def _add(self, hashes):
+        self.pending = _sorted_union(self.pending, hashes)
+        if self.bloom is not None:
+            self.bloom.add(hashes)
+    
+    def _load(self):
+        bloom_bits = None
+        if os.path.exists(self.path):
+            with np.load(self.path) as stored:
+                self.hashes = stored['hashes']
+                self.expected_items = max(int(stored['expected_items']), self.expected_items)
+                if 'bloom_bits' in stored:
+                    bloom_bits = stored['bloom_bits']
+        
+        if self.use_bloom:
+            self._build_bloom(bloom_bits)
+    
+    def _build_bloom(self, bits=None):
+        self.bloom = BloomFilter(self.expected_items, self.false_positive_rate)
+        if bits is not None and len(bits) == len(self.bloom.bits):
+            self.bloom.bits = bits.copy()
+        else:
+            self.bloom.add(self.hashes)
+            self.bloom.add(self.pending)
+
+def _sorted_union(left, right):
+    """União ordenada e sem repetição (np.union1d é lento para uint64)"""
+    merged = np.sort(np.concatenate([left, right]))
+    if len(merged) == 0:
+        return merged
+    return merged[np.concatenate([[True], merged[1:] != merged[:-1]])]
+
+def _in_sorted(sorted_hashes, hashes):
+    """Busca binária vetorizada em um vetor ordenado"""
+    if len(sorted_hashes) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+    return sorted_hashes[positions] == hashes
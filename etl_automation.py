@@ -11,7 +11,36 @@ import logging
 from datetime import datetime, timedelta
 import os
 import json
+import hashlib
+import argparse
+import glob
+import re
+import contextlib
+import functools
+import itertools
+import sys
+import time
+import tempfile
+import tracemalloc
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+import openpyxl
+import xlsxwriter
+import sqlalchemy as sa
+from checkpoints import CheckpointStore, ETL_STAGES
+from data_profiler import DataProfile
+from dedup_index import DedupIndex
+from date_dimension import DateDimension, days_since
+from external_rank import ExternalRanker
+from incremental_state import IncrementalState, dept_stats_from_frame, select_new_rows
+from data_hub import read_arrow_file, write_arrow_file, _copy_on_write_enabled
+from excel_reader import read_excel, read_csv, iter_excel_chunks, infer_schema, load_schema, save_schema
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # Configuração de logging
 logging.basicConfig(
@@ -23,13 +52,665 @@ logging.basicConfig(
     ]
 )
 
+# Estatísticas de Valor por departamento (colunas Dept_*)
+_DEPT_STAT_FUNCS = ['count', 'sum', 'mean', 'std', 'min', 'max']
+
+def read_input_file(input_file, sheet_name, engine='auto', usecols=None, schema=None):
+    """Lê um arquivo de entrada (xlsx ou csv) - função de módulo para uso em processos"""
+    if input_file.lower().endswith('.csv'):
+        return read_csv(input_file, usecols=usecols, schema=schema)
+    return read_excel(input_file, sheet_name=sheet_name, engine=engine, usecols=usecols, schema=schema)
+
+class PipelineMetrics:
+    """
+    Métricas de tempo, CPU, registros e memória por etapa do pipeline.
+    
+    A memória de cada etapa é a variação da memória residente (rss_delta_mb) e,
+    com trace_memory, o pico do tracemalloc zerado no início da etapa. O pico de
+    RSS do processo, que só cresce, é registrado uma vez para a execução toda.
+    """
+    
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self.stages = {}
+        self._stack = []
+        self._started_tracemalloc = False
+    
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        """Mede uma etapa; o registro entregue aceita 'rows_out'"""
+        record = {'rows_in': rows_in, 'rows_out': None}
+        frame = {'peak': 0}
+        
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            current, peak = tracemalloc.get_traced_memory()
+            # O pico da etapa externa é preservado antes de zerar para a interna
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        
+        self._stack.append(frame)
+        rss_start = _current_rss_mb()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        
+        try:
+            yield record
+        finally:
+            record['wall_time_s'] = time.perf_counter() - wall_start
+            record['cpu_time_s'] = time.process_time() - cpu_start
+            self._stack.pop()
+            
+            if self.trace_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+                record['tracemalloc_peak_mb'] = max(peak - current, 0) / 1024 ** 2
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            
+            rss_end = _current_rss_mb()
+            record['rss_delta_mb'] = None if rss_start is None or rss_end is None else rss_end - rss_start
+            self._record(name, record)
+    
+    def timed_iter(self, name, iterable):
+        """Mede cada leitura de um iterador de blocos como uma chamada da etapa"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as record:
+                item = next(iterator, None)
+                record['rows_out'] = 0 if item is None else len(item)
+            if item is None:
+                return
+            yield item
+    
+    def _record(self, name, record):
+        """Acumula chamadas repetidas da mesma etapa (modo em blocos)"""
+        totals = self.stages.setdefault(name, {
+            'calls': 0, 'wall_time_s': 0.0, 'cpu_time_s': 0.0,
+            'rows_in': None, 'rows_out': None, 'rss_delta_mb': None
+        })
+        totals['calls'] += 1
+        totals['wall_time_s'] += record['wall_time_s']
+        totals['cpu_time_s'] += record['cpu_time_s']
+        
+        for key in ('rows_in', 'rows_out'):
+            if record[key] is not None:
+                totals[key] = (totals[key] or 0) + record[key]
+        
+        # Chamadas repetidas: maior variação/pico observado em uma chamada
+        for key in ('rss_delta_mb', 'tracemalloc_peak_mb'):
+            if record.get(key) is not None:
+                totals[key] = record[key] if totals.get(key) is None else max(totals[key], record[key])
+    
+    def to_dict(self):
+        """Representação serializável das métricas"""
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'trace_memory': self.trace_memory,
+            'peak_rss_mb': _peak_rss_mb(),
+            'stages': self.stages
+        }
+    
+    def save(self, metrics_file):
+        """Grava as métricas em JSON e encerra o tracemalloc iniciado aqui"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+        
+        logging.info(f"Métricas de execução salvas em: {metrics_file}")
+
+class StreamingExcelWriter:
+    """
+    Grava planilhas linha a linha, sem manter o modelo do workbook em memória.
+    
+    Backends: 'xlsxwriter' (modo constant_memory) e 'openpyxl' (modo write-only).
+    As linhas de cada aba precisam ser gravadas em ordem.
+    """
+    
+    def __init__(self, output_file, engine='xlsxwriter'):
+        self.output_file = output_file
+        self.engine = engine
+        self._sheets = {}
+        self._next_row = {}
+        
+        if engine == 'xlsxwriter':
+            self.workbook = xlsxwriter.Workbook(output_file, {
+                'constant_memory': True,
+                'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+            })
+        elif engine == 'openpyxl':
+            self.workbook = openpyxl.Workbook(write_only=True)
+        else:
+            raise ValueError(f"Backend de escrita Excel desconhecido: {engine}")
+    
+    def append(self, sheet_name, row):
+        """Acrescenta uma linha ao final da aba (criada no primeiro uso)"""
+        if sheet_name not in self._sheets:
+            if self.engine == 'xlsxwriter':
+                self._sheets[sheet_name] = self.workbook.add_worksheet(sheet_name)
+            else:
+                self._sheets[sheet_name] = self.workbook.create_sheet(sheet_name)
+            self._next_row[sheet_name] = 0
+        
+        if self.engine == 'xlsxwriter':
+            self._sheets[sheet_name].write_row(self._next_row[sheet_name], 0, row)
+        else:
+            self._sheets[sheet_name].append(row)
+        self._next_row[sheet_name] += 1
+    
+    def write_frame(self, sheet_name, df, index=False, header=True):
+        """Grava um DataFrame na aba, convertendo um bloco de linhas por vez"""
+        for row in _frame_rows(df, index=index, header=header):
+            self.append(sheet_name, row)
+    
+    def close(self):
+        """Finaliza o arquivo em disco"""
+        if self.engine == 'xlsxwriter':
+            self.workbook.close()
+        else:
+            self.workbook.save(self.output_file)
+
+def write_excel_sheets(output_file, engine, sheets):
+    """Grava as abas (nome, DataFrame, índice) no workbook com o backend escolhido"""
+    if engine == 'xlsxwriter':
+        # Linha a linha em modo constant_memory
+        writer = StreamingExcelWriter(output_file, engine='xlsxwriter')
+        for sheet_name, df, index in sheets:
+            writer.write_frame(sheet_name, df, index=index)
+        writer.close()
+        return
+    
+    # pandas/openpyxl: modelo completo do workbook em memória
+    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+        for sheet_name, df, index in sheets:
+            df.to_excel(writer, sheet_name=sheet_name, index=index)
+
+def write_csv_file(df, csv_file):
+    """Grava o CSV de compatibilidade (utf-8 com BOM para o Excel)"""
+    df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+
+def write_star_schema(path, file_format, compression, tables):
+    """Grava as tabelas do modelo estrela (uma por arquivo) em um diretório"""
+    output_dir = Path(path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    for name, df in tables.items():
+        if file_format == 'csv':
+            df.to_csv(output_dir / f"{name}.csv", index=False, encoding='utf-8-sig')
+        else:
+            df.to_parquet(output_dir / f"{name}.parquet", index=False, compression=compression)
+
+_SQL_ENGINES = {}
+
+def _sql_engine(url, pool_size):
+    """Engine com pool de conexões, reutilizada entre cargas do mesmo processo"""
+    if url not in _SQL_ENGINES:
+        options = {'pool_pre_ping': True}
+        if not url.startswith('sqlite'):
+            options['pool_size'] = pool_size
+        _SQL_ENGINES[url] = sa.create_engine(url, **options)
+    return _SQL_ENGINES[url]
+
+def _sql_column_type(dtype):
+    """Tipo SQLAlchemy correspondente ao dtype pandas"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return sa.Boolean()
+    if pd.api.types.is_integer_dtype(dtype):
+        return sa.BigInteger()
+    if pd.api.types.is_float_dtype(dtype):
+        return sa.Float()
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return sa.DateTime()
+    return sa.Text()
+
+def _upsert_statement(engine, table, key):
+    """INSERT com atualização em conflito na chave, no dialeto do banco"""
+    dialect = engine.dialect.name
+    update_columns = [col.name for col in table.columns if col.name != key]
+    
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={col: stmt.excluded[col] for col in update_columns}
+        )
+    
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+    
+    raise ValueError(f"Upsert não suportado para o banco: {dialect}")
+
+def write_sql_tables(settings, tables):
+    """
+    Carrega as tabelas no banco em lotes de batch_size (executemany/multi-row).
+    
+    Tabelas com chave recebem upsert; as demais (resumos) são substituídas.
+    Cada lote é confirmado em sua própria transação.
+    """
+    engine = _sql_engine(settings["url"], settings["pool_size"])
+    batch_size = settings["batch_size"]
+    metadata = sa.MetaData()
+    
+    for table_name, df, key in tables:
+        df = df.reset_index() if key is None and df.index.name is not None else df
+        columns = [str(col) for col in df.columns]
+        table = sa.Table(table_name, metadata, *[
+            sa.Column(name, sa.String(64) if name == key else _sql_column_type(dtype), primary_key=name == key)
+            for name, dtype in zip(columns, df.dtypes)
+        ])
+        
+        if key is None:
+            table.drop(engine, checkfirst=True)
+            stmt = table.insert()
+        else:
+            stmt = _upsert_statement(engine, table, key)
+        table.create(engine, checkfirst=True)
+        
+        rows = _frame_rows(df, header=False, block_size=batch_size)
+        while True:
+            batch = [dict(zip(columns, row)) for row in itertools.islice(rows, batch_size)]
+            if not batch:
+                break
+            with engine.begin() as connection:
+                connection.execute(stmt, batch)
+        
+        logging.info(f"Tabela '{table_name}' carregada: {len(df)} registros")
+
+def _flatten_summary(summary):
+    """Achata colunas MultiIndex (Valor/count -> Valor_count) e expõe o índice"""
+    summary = summary.copy()
+    summary.columns = ['_'.join(str(part) for part in col) for col in summary.columns]
+    return summary.reset_index()
+
+def _run_sink(name, func, args):
+    """Executa uma saída medindo o tempo; erros são devolvidos, não propagados"""
+    start = time.perf_counter()
+    try:
+        func(*args)
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {'sink': name, 'wall_time_s': time.perf_counter() - start, 'error': error}
+
+def _frame_rows(df, index=False, header=True, block_size=10000):
+    """Gera as linhas de um DataFrame como listas de valores Python (nulos viram None)"""
+    index_levels = df.index.nlevels if index else 0
+    
+    if header:
+        # Mesmo layout de DataFrame.to_excel: rótulos repetidos dos níveis superiores
+        # aparecem uma vez e, com colunas MultiIndex, os nomes do índice vêm numa linha própria
+        column_levels = df.columns.nlevels
+        for level in range(column_levels):
+            labels = list(df.columns.get_level_values(level)) if column_levels > 1 else list(df.columns)
+            if level < column_levels - 1:
+                labels = [None if position and label == labels[position - 1] else label
+                          for position, label in enumerate(labels)]
+            if level == column_levels - 1 and index and column_levels == 1:
+                prefix = list(df.index.names)
+            else:
+                prefix = [None] * index_levels
+            yield prefix + labels
+        
+        if column_levels > 1 and index and any(name is not None for name in df.index.names):
+            yield list(df.index.names) + [None] * df.shape[1]
+    
+    previous = None
+    for start in range(0, len(df), block_size):
+        block = df.iloc[start:start + block_size]
+        columns = [_python_values(block.index.get_level_values(level)) for level in range(index_levels)]
+        columns += [_python_values(block.iloc[:, position]) for position in range(block.shape[1])]
+        for row in zip(*columns):
+            row = list(row)
+            # Níveis externos do índice repetidos aparecem uma vez, como em to_excel
+            if index_levels > 1:
+                key = row[:index_levels]
+                for level in range(index_levels - 1):
+                    if previous is None or key[level] != previous[level]:
+                        break
+                    row[level] = None
+                previous = key
+            yield row
+
+def _python_values(values):
+    """Converte uma coluna para escalares Python aceitos pelos gravadores Excel"""
+    series = pd.Series(values)
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def _current_rss_mb():
+    """Memória residente atual do processo (lida de /proc; None fora do Linux)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+def _peak_rss_mb():
+    """Pico de memória residente do processo desde o início (indisponível no Windows)"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+def _metered(stage_name, rows_in='processed_data', rows_out='processed_data'):
+    """Registra a chamada do método como etapa em self.metrics"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            frame_in = getattr(self, rows_in) if rows_in else None
+            with self.metrics.stage(stage_name, None if frame_in is None else len(frame_in)) as record:
+                result = method(self, *args, **kwargs)
+                frame_out = getattr(self, rows_out) if rows_out else None
+                record['rows_out'] = None if frame_out is None else len(frame_out)
+            return result
+        return wrapper
+    return decorator
+
+def _deep_update(base, override):
+    """Mescla override em base; seções aninhadas são mescladas chave a chave"""
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _deep_update(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+def _group_positions(keys, group_index):
+    """Posição de cada chave em group_index (-1 se ausente), resolvida pelas categorias"""
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        category_positions = np.append(group_index.get_indexer(keys.cat.categories), -1)
+        return category_positions[keys.cat.codes.to_numpy()]
+    return group_index.get_indexer(keys)
+
+def _broadcast_group_stats(keys, stats):
+    """
+    Estatísticas por grupo repetidas em cada linha (sem o merge, que recria o DataFrame).
+    
+    Gera (coluna, valores) uma coluna por vez: atribuída ao DataFrame, cada uma é
+    copiada e liberada antes da próxima.
+    """
+    positions = _group_positions(keys, stats.index)
+    missing = (positions < 0).any()
+    for col in stats.columns:
+        values = stats[col].to_numpy()
+        if missing:
+            values = np.append(values.astype(float), np.nan)
+        yield col, values[positions]
+
+def _merge_dept_stats(old_stats, new_stats):
+    """
+    Combina acumuladores por departamento (contagem, soma, média, mínimo, máximo,
+    M2) pelo algoritmo paralelo de Chan; departamentos de um só lado são mantidos.
+    """
+    old_stats, new_stats = old_stats.align(new_stats, join='outer', axis=0)
+    old_stats[['count', 'sum', 'm2']] = old_stats[['count', 'sum', 'm2']].fillna(0)
+    new_stats[['count', 'sum', 'm2']] = new_stats[['count', 'sum', 'm2']].fillna(0)
+    
+    count = old_stats['count'] + new_stats['count']
+    delta = new_stats['mean'].fillna(0) - old_stats['mean'].fillna(0)
+    return pd.DataFrame({
+        'count': count,
+        'sum': old_stats['sum'] + new_stats['sum'],
+        'mean': (old_stats['sum'] + new_stats['sum']) / count,
+        'min': pd.concat([old_stats['min'], new_stats['min']], axis=1).min(axis=1),
+        'max': pd.concat([old_stats['max'], new_stats['max']], axis=1).max(axis=1),
+        'm2': old_stats['m2'] + new_stats['m2'] + delta ** 2 * old_stats['count'] * new_stats['count'] / count
+    })
+
+def _dept_stat_columns(dept_stats):
+    """Colunas Dept_* por departamento a partir dos acumuladores (como em _calculate_aggregations)"""
+    std = np.sqrt(dept_stats['m2'] / (dept_stats['count'] - 1).where(dept_stats['count'] > 1))
+    return pd.DataFrame({
+        'Dept_count': dept_stats['count'].astype(int),
+        'Dept_sum': dept_stats['sum'].round(2),
+        'Dept_mean': dept_stats['mean'].round(2),
+        'Dept_std': std.round(2),
+        'Dept_min': dept_stats['min'].round(2),
+        'Dept_max': dept_stats['max'].round(2)
+    })
+
+def _duplicated_rows(df, block_size=65536):
+    """
+    Mesmo resultado de df.duplicated(), com memória de trabalho de poucas colunas.
+    
+    Hashes de linha calculados por blocos apontam as candidatas (hash repetido);
+    só essas linhas passam pela comparação exata de duplicated().
+    """
+    hashes = np.empty(len(df), dtype=np.uint64)
+    for start in range(0, len(df), block_size):
+        block = df.iloc[start:start + block_size]
+        hashes[start:start + len(block)] = pd.util.hash_pandas_object(block, index=False).to_numpy()
+    
+    sorted_hashes = np.sort(hashes)
+    repeated = np.unique(sorted_hashes[1:][sorted_hashes[1:] == sorted_hashes[:-1]])
+    del sorted_hashes
+    candidates = np.isin(hashes, repeated)
+    
+    duplicated = np.zeros(len(df), dtype=bool)
+    if candidates.any():
+        duplicated[candidates] = df[candidates].duplicated().to_numpy()
+    return duplicated
+
+def _smallest_int_dtype(values):
+    """Menor inteiro (do mesmo sinal) que comporta os valores, como to_numeric(downcast=...)"""
+    if not len(values):
+        return values.dtype
+    low, high = values.min(), values.max()
+    candidates = (np.uint8, np.uint16, np.uint32) if values.dtype.kind == 'u' else (np.int8, np.int16, np.int32)
+    for dtype in candidates:
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return values.dtype
+
+def _fits_float32(values, block_size=65536):
+    """Verifica por blocos se a conversão para float32 é exata (para no primeiro bloco com perda)"""
+    for start in range(0, len(values), block_size):
+        block = values[start:start + block_size]
+        if not np.array_equal(block.astype(np.float32).astype(block.dtype), block, equal_nan=True):
+            return False
+    return True
+
+def _temp_path(path):
+    """Caminho temporário ao lado do arquivo, com a mesma extensão (dados.xlsx -> dados.tmp.xlsx)"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.tmp{extension}"
+
+def _value_bands(valor):
+    """Faixa de valor (Baixo, Médio, Alto, Muito Alto)"""
+    return pd.cut(
+        valor,
+        bins=[0, 1000, 5000, 15000, float('inf')],
+        labels=['Baixo', 'Médio', 'Alto', 'Muito Alto']
+    )
+
+def _transform_partition(input_path, output_path, settings):
+    """
+    Etapas locais de uma partição de Departamento, executada em outro processo.
+    
+    A partição chega e volta como arquivo Arrow IPC mapeado em memória, com apenas
+    Data, Valor e Departamento na ida e as colunas novas na volta.
+    """
+    df = read_arrow_file(input_path)
+    result = pd.DataFrame(index=df.index)
+    
+    if 'Data' in df.columns:
+        extra_columns = settings["extra_date_columns"]
+        dimension = DateDimension(settings["fiscal_year_start_month"], settings["holidays"]).lookup(
+            df['Data'], ['Dia_Semana', 'Semana_Ano'] + extra_columns
+        )
+        result['Dia_Semana'] = dimension['Dia_Semana']
+        result['Semana_Ano'] = dimension['Semana_Ano']
+        result['Dias_Desde_Hoje'] = days_since(df['Data'], settings["reference"])
+        for col in extra_columns:
+            result[col] = dimension[col]
+    
+    result['Faixa_Valor'] = _value_bands(df['Valor'])
+    
+    # Cada departamento está inteiro em uma única partição
+    dept_stats = df.groupby('Departamento', observed=True)['Valor'].agg(_DEPT_STAT_FUNCS).round(2)
+    dept_stats.columns = [f'Dept_{col}' for col in dept_stats.columns]
+    for col, values in _broadcast_group_stats(df['Departamento'], dept_stats):
+        result[col] = values
+    
+    write_arrow_file(result, output_path)
+    return output_path
+
+def _range_mask(series, bounds):
+    """Máscara de valores fora de [min, max]; nulos são tratados pela regra not_null"""
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    invalid = np.zeros(len(values), dtype=bool)
+    if bounds.get("min") is not None:
+        invalid |= values < bounds["min"]
+    if bounds.get("max") is not None:
+        invalid |= values > bounds["max"]
+    return invalid
+
+def _unique_values_mask(series, check_uniques):
+    """Aplica check_uniques só aos valores distintos e expande o resultado pelos códigos"""
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return np.zeros(len(codes), dtype=bool)
+    invalid_uniques = np.asarray(check_uniques(pd.Series(uniques)), dtype=bool)
+    # Nulos (código -1) ficam a cargo da regra not_null
+    return np.where(codes >= 0, invalid_uniques[codes], False)
+
+def _clean_categorical(series, fill_value):
+    """Preenchimento de nulos e strip aplicados às categorias, não a cada linha"""
+    labels = series.cat.categories.astype(str).str.strip()
+    codes = series.cat.codes.to_numpy()
+    if (codes == -1).any():
+        labels = labels.append(pd.Index([fill_value]))
+        codes = np.where(codes == -1, len(labels) - 1, codes)
+    
+    # Rótulos que coincidem após o strip passam a ser uma única categoria
+    categories = pd.Index(sorted(set(labels)))
+    new_codes = categories.get_indexer(labels)[codes]
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=categories), index=series.index, name=series.name)
+
+def _normalize_label(value):
+    """Chave de comparação: sem acentos, casefold e espaços colapsados"""
+    text = unicodedata.normalize('NFKD', str(value))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+class CategoryNormalizer:
+    """
+    Normalização de categorias aplicada apenas aos valores distintos.
+    
+    Cada valor bruto é reduzido a uma chave (_normalize_label); variantes com a
+    mesma chave recebem o mesmo rótulo canônico (sinônimo configurado ou a
+    variante mais frequente). O mapa bruto -> canônico é persistido entre execuções.
+    """
+    
+    def __init__(self, synonyms=None, cache_file=None):
+        self.synonyms = {
+            col: {_normalize_label(raw): canonical for raw, canonical in mapping.items()}
+            for col, mapping in (synonyms or {}).items()
+        }
+        self.cache_file = cache_file
+        self.fingerprint = hashlib.md5(json.dumps(self.synonyms, sort_keys=True).encode()).hexdigest()
+        self.mapping = {}
+        self._dirty = False
+        self._load()
+    
+    def normalize(self, series, column):
+        """Normaliza uma coluna remapeando códigos (custo proporcional aos distintos)"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            uniques = series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        
+        column_map = self.mapping.setdefault(column, {})
+        missing = [value for value in uniques if value not in column_map]
+        if missing:
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            frequency = dict(zip(uniques, counts))
+            self._resolve(column, sorted(missing, key=lambda value: -frequency[value]))
+        
+        canonical = [column_map[value] for value in uniques]
+        canonical_codes, categories = pd.factorize(pd.Index(canonical, dtype=object))
+        new_codes = np.where(codes >= 0, canonical_codes[np.maximum(codes, 0)], -1)
+        
+        result = pd.Series(pd.Categorical.from_codes(new_codes, categories=categories), index=series.index, name=series.name)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return result
+        return result.astype(series.dtype)
+    
+    def save(self):
+        """Grava o mapa de categorias se houver valores novos"""
+        if not self._dirty or not self.cache_file:
+            return
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'mapping': self.mapping}, f, indent=2, ensure_ascii=False)
+        self._dirty = False
+    
+    def _resolve(self, column, values):
+        # Chaves já conhecidas mantêm o rótulo escolhido em execuções anteriores
+        column_map = self.mapping[column]
+        known = {_normalize_label(raw): canonical for raw, canonical in column_map.items()}
+        synonyms = self.synonyms.get(column, {})
+        
+        for value in values:
+            key = _normalize_label(value)
+            if key in synonyms:
+                canonical = synonyms[key]
+            elif key in known:
+                canonical = known[key]
+            else:
+                canonical = ' '.join(str(value).split())
+            known[key] = canonical
+            column_map[value] = canonical
+        
+        self._dirty = True
+    
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Mapa de categorias ignorado: {str(e)}")
+            return
+        
+        # Sinônimos alterados invalidam o mapa salvo
+        if cached.get('fingerprint') == self.fingerprint:
+            self.mapping = cached.get('mapping', {})
+
 class ETLProcessor:
     """Classe principal para processamento ETL"""
     
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, hub=None):
         self.config = self.load_config(config_file)
+        self.hub = hub
         self.data = None
         self.processed_data = None
+        self.validation_report = None
+        self.dtype_report = {}
+        self.data_version = 0
+        self.metrics = PipelineMetrics(self.config["trace_memory"])
+        self._aggregation_cache = {}
+        self._quarantine_started = False
+        self.profile = None
+        self.dedup_index = None
+        self.category_normalizer = None
+        self.date_dimension = None
+        self.read_schemas = {}
+        self.stream_totals = None
         
     def load_config(self, config_file):
         """Carrega configurações do ETL"""
@@ -40,34 +721,163 @@ class ETLProcessor:
             "date_columns": ["Data"],
             "numeric_columns": ["Valor", "Valor_Acumulado", "Media_Mensal_Dept"],
             "categorical_columns": ["Departamento", "Categoria", "Status"],
+            "excel_writer": "openpyxl",
+            "excel_reader": "auto",
+            "input_columns": None,
+            "read_schema": {
+                "enabled": True,
+                "dir": ".etl_esquemas"
+            },
+            "parquet_output": {
+                "enabled": False,
+                "path": "dados_processados_parquet",
+                "partition_cols": ["Ano", "Mes"],
+                "compression": "snappy",
+                "row_group_size": 100000
+            },
+            "sql_source": {
+                "url": None,
+                "query": "SELECT * FROM transacoes WHERE Data >= :watermark",
+                "params": {},
+                "initial_watermark": "1900-01-01",
+                "chunk_size": 50000
+            },
+            "star_schema": {
+                "enabled": False,
+                "path": "modelo_estrela",
+                "format": "parquet",
+                "compression": "snappy",
+                "dimensions": ["Departamento", "Categoria", "Fornecedor"]
+            },
+            "sql_output": {
+                "enabled": False,
+                "url": "sqlite:///dados_processados.db",
+                "table": "dados_processados",
+                "key": "ID",
+                "summary_tables": True,
+                "batch_size": 5000,
+                "pool_size": 5
+            },
+            "parallel_sinks": True,
+            "sink_executors": {"excel": "thread", "csv": "thread", "parquet": "thread", "star_schema": "thread", "sql": "thread"},
+            "metrics_file": "etl_metrics.json",
+            "checkpoints": {
+                "enabled": False,
+                "dir": ".etl_checkpoints"
+            },
+            "resume_from": None,
+            "quality_report_mode": "exact",
+            "profile_exact_duplicates": False,
+            "trace_memory": False,
+            "low_copy_transform": True,
+            "optimize_dtypes": True,
+            "category_max_ratio": 0.5,
+            "arrow_strings": False,
+            "max_workers": None,
+            "parallel_transform": {
+                "enabled": False,
+                "partitions": None,
+                "min_rows": 200000
+            },
+            "chunk_size": None,
+            "streaming_ranks": {
+                "mode": "external",
+                "spill_dir": None,
+                "block_size": 1000000
+            },
+            "use_cache": True,
+            "cache_dir": ".etl_cache",
+            "cache_max_bytes": 512 * 1024 * 1024,
+            "cache_hash_content": False,
+            "incremental": False,
+            "watermark_file": "etl_watermark.json",
+            "incremental_state_file": "etl_estado_incremental.parquet",
+            "quarantine_file": "dados_quarentena.csv",
+            "date_dimension": {
+                "columns": [],
+                "fiscal_year_start_month": 1,
+                "holidays": []
+            },
+            "category_normalization": {
+                "columns": ["Departamento", "Categoria", "Status", "Fornecedor"],
+                "synonyms": {
+                    "Status": {
+                        "aprovado": "Aprovado",
+                        "pendente": "Pendente",
+                        "rejeitado": "Rejeitado",
+                        "em analise": "Em Análise"
+                    }
+                },
+                "cache_file": "etl_mapa_categorias.json"
+            },
+            "dedup_index": {
+                "enabled": False,
+                "path": "etl_indice_dedup.npz",
+                "key_columns": ["ID"],
+                "bloom_filter": True,
+                "expected_items": 1000000,
+                "false_positive_rate": 0.001
+            },
             "validation_rules": {
                 "valor_min": 0,
                 "valor_max": 100000,
-                "required_columns": ["ID", "Data", "Departamento", "Valor"]
+                "required_columns": ["ID", "Data", "Departamento", "Valor"],
+                "not_null": ["ID", "Data", "Departamento", "Valor"],
+                "ranges": {"Mes": {"min": 1, "max": 12}},
+                "enums": {
+                    "Status": ["Aprovado", "Pendente", "Rejeitado", "Em Análise"],
+                    "Tipo_Transacao": ["Despesa", "Receita", "Transferência"]
+                },
+                "patterns": {"ID": r"^TXN\d+$", "Centro_Custo": r"^CC\d{4}$"},
+                "cross_column": [
+                    {"name": "acumulado_maior_que_valor", "expr": "Valor_Acumulado >= Valor"}
+                ],
+                "reject_invalid": True
             }
         }
         
         if config_file and os.path.exists(config_file):
             with open(config_file, 'r') as f:
                 user_config = json.load(f)
-                default_config.update(user_config)
+                _deep_update(default_config, user_config)
         
         return default_config
     
+    @_metered('extract', rows_in=None, rows_out='data')
     def extract(self):
         """Fase de Extração - Carrega dados de diferentes fontes"""
         try:
             logging.info("Iniciando fase de EXTRAÇÃO...")
             
-            # Verificar se arquivo existe
-            if not os.path.exists(self.config["input_file"]):
-                raise FileNotFoundError(f"Arquivo não encontrado: {self.config['input_file']}")
-            
-            # Carregar dados do Excel
-            self.data = pd.read_excel(
-                self.config["input_file"], 
-                sheet_name=self.config["sheet_name"]
-            )
+            if self.config["sql_source"]["url"]:
+                # Banco de dados: leitura em blocos por cursor no servidor
+                chunks = list(self._extract_sql_chunks(self.config["sql_source"]["chunk_size"]))
+                self.data = pd.concat(chunks, ignore_index=True)
+            else:
+                input_files = self.resolve_input_files()
+                
+                # Reaproveitar cache colunar dos arquivos que não mudaram
+                frames = {}
+                if self.config["use_cache"]:
+                    for input_file in input_files:
+                        cached = self._read_extract_cache(input_file)
+                        if cached is not None:
+                            frames[input_file] = cached
+                
+                pending = [f for f in input_files if f not in frames]
+                frames.update(self._read_input_files(pending))
+                for input_file in pending:
+                    self._update_read_schema(input_file, frames[input_file])
+                
+                if self.config["use_cache"]:
+                    for input_file in pending:
+                        self._write_extract_cache(frames[input_file], input_file)
+                
+                # Esquema unificado: união das colunas na ordem de aparição
+                if len(input_files) == 1:
+                    self.data = frames[input_files[0]]
+                else:
+                    self.data = pd.concat([frames[f] for f in input_files], ignore_index=True, sort=False)
             
             logging.info(f"Dados extraídos com sucesso: {len(self.data)} registros")
             logging.info(f"Colunas encontradas: {list(self.data.columns)}")
@@ -78,6 +888,254 @@ class ETLProcessor:
             logging.error(f"Erro na extração: {str(e)}")
             return False
     
+    def resolve_input_files(self):
+        """Expande input_file (caminho, padrão glob ou lista) na lista de arquivos"""
+        input_file = self.config["input_file"]
+        patterns = input_file if isinstance(input_file, list) else [input_file]
+        
+        input_files = []
+        for pattern in patterns:
+            if any(char in pattern for char in '*?['):
+                input_files.extend(sorted(glob.glob(pattern)))
+            else:
+                input_files.append(pattern)
+        
+        missing = [f for f in input_files if not os.path.exists(f)]
+        if not input_files or missing:
+            raise FileNotFoundError(f"Arquivo não encontrado: {missing or input_file}")
+        
+        return input_files
+    
+    def _read_input_files(self, input_files):
+        """Lê os arquivos em paralelo num pool de processos (parsing Excel é CPU-bound)"""
+        max_workers = min(self.config["max_workers"] or os.cpu_count() or 1, len(input_files))
+        usecols = self._needed_columns()
+        schemas = [self._get_read_schema(f) for f in input_files]
+        
+        # Registro compartilhado (DataHub): visões de fontes já lidas por outro pipeline
+        if self.hub is not None:
+            return {f: self.hub.get(f, self.config["sheet_name"], usecols, schema) for f, schema in zip(input_files, schemas)}
+        
+        if max_workers <= 1:
+            return {
+                f: read_input_file(f, self.config["sheet_name"], self.config["excel_reader"], usecols, schema)
+                for f, schema in zip(input_files, schemas)
+            }
+        
+        logging.info(f"Lendo {len(input_files)} arquivos com {max_workers} processos...")
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                read_input_file, input_files,
+                [self.config["sheet_name"]] * len(input_files),
+                [self.config["excel_reader"]] * len(input_files),
+                [usecols] * len(input_files),
+                schemas
+            )
+            return dict(zip(input_files, results))
+    
+    def _needed_columns(self):
+        """
+        Colunas de entrada a ler (projeção): input_columns mais as colunas usadas
+        pela validação, pela deduplicação e pelas colunas derivadas. None lê todas.
+        """
+        selected = self.config["input_columns"]
+        if not selected:
+            return None
+        
+        rules = self.config["validation_rules"]
+        # Mesmos padrões de compile_validation_rules: regras ausentes não restringem nada
+        needed = list(selected) + list(rules.get("required_columns", [])) + list(rules.get("not_null", []))
+        needed += list(rules.get("ranges", {})) + list(rules.get("enums", {})) + list(rules.get("patterns", {}))
+        for rule in rules.get("cross_column", []):
+            needed += re.findall(r'[A-Za-z_]\w*', rule["expr"])
+        needed += ['Data', 'Valor', 'Departamento'] + list(self.config["dedup_index"].get("key_columns") or [])
+        return list(dict.fromkeys(needed))
+    
+    def _schema_file(self, input_file):
+        """Arquivo do esquema de leitura de um arquivo/aba de entrada"""
+        source = f"{Path(input_file).resolve()}|{self.config['sheet_name']}"
+        name = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+        return Path(self.config["read_schema"]["dir"]) / f"{name}.json"
+    
+    def _get_read_schema(self, input_file):
+        """Esquema persistido do arquivo (None se desativado ou ainda não inferido)"""
+        if not self.config["read_schema"]["enabled"]:
+            return None
+        if input_file not in self.read_schemas:
+            self.read_schemas[input_file] = load_schema(self._schema_file(input_file))
+        return self.read_schemas[input_file]
+    
+    def _update_read_schema(self, input_file, frame):
+        """Incorpora ao esquema do arquivo as colunas lidas e grava se algo mudou"""
+        if not self.config["read_schema"]["enabled"]:
+            return
+        
+        try:
+            previous = (self._get_read_schema(input_file) or {'columns': {}})['columns']
+            columns = dict(previous)
+            for col, spec in infer_schema(frame, self.config["category_max_ratio"])['columns'].items():
+                # Categorias acumulam entre execuções; datas já lidas como
+                # datetime mantêm o formato de texto inferido antes
+                known = columns.get(col, {})
+                if spec['dtype'] == 'category' and known.get('dtype') == 'category':
+                    spec['categories'] = sorted(set(spec['categories']) | set(known['categories']))
+                elif spec['dtype'].startswith('datetime64') and known.get('format'):
+                    spec['format'] = known['format']
+                columns[col] = spec
+            
+            if columns != previous:
+                schema_file = self._schema_file(input_file)
+                schema_file.parent.mkdir(parents=True, exist_ok=True)
+                self.read_schemas[input_file] = {'version': 1, 'columns': columns}
+                save_schema(self.read_schemas[input_file], schema_file)
+                logging.info(f"Esquema de leitura atualizado: {schema_file} ({len(columns)} colunas)")
+                
+        except Exception as e:
+            logging.warning(f"Não foi possível atualizar o esquema de leitura: {str(e)}")
+    
+    def _cache_key(self, input_file):
+        """Calcula (prefixo, impressão digital) do arquivo de entrada para o cache"""
+        input_path = Path(input_file).resolve()
+        stat = input_path.stat()
+        
+        prefix = hashlib.sha1(f"{input_path}|{self.config['sheet_name']}|{self._needed_columns()}".encode('utf-8')).hexdigest()[:16]
+        fingerprint = f"{stat.st_size}|{stat.st_mtime_ns}"
+        
+        if self.config["cache_hash_content"]:
+            content_hash = hashlib.sha256()
+            with open(input_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    content_hash.update(block)
+            fingerprint += f"|{content_hash.hexdigest()}"
+        
+        return prefix, hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:16]
+    
+    def _read_extract_cache(self, input_file):
+        """Lê a planilha do cache Parquet, se houver entrada válida"""
+        try:
+            prefix, fingerprint = self._cache_key(input_file)
+            cache_file = Path(self.config["cache_dir"]) / f"{prefix}_{fingerprint}.parquet"
+            
+            if not cache_file.exists():
+                return None
+            
+            data = pd.read_parquet(cache_file)
+            os.utime(cache_file)  # Marca uso recente para a política LRU
+            logging.info(f"Dados carregados do cache: {cache_file}")
+            return data
+            
+        except Exception as e:
+            logging.warning(f"Cache de extração indisponível: {str(e)}")
+            return None
+    
+    def _write_extract_cache(self, data, input_file):
+        """Grava a planilha no cache Parquet e aplica a política de retenção"""
+        try:
+            cache_dir = Path(self.config["cache_dir"])
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            prefix, fingerprint = self._cache_key(input_file)
+            
+            # Entradas antigas do mesmo arquivo/aba ficam inválidas
+            for stale_file in cache_dir.glob(f"{prefix}_*.parquet"):
+                stale_file.unlink()
+            
+            cache_file = cache_dir / f"{prefix}_{fingerprint}.parquet"
+            data.to_parquet(cache_file, index=False)
+            logging.info(f"Cache de extração atualizado: {cache_file}")
+            
+            self._evict_cache()
+            
+        except Exception as e:
+            logging.warning(f"Não foi possível gravar o cache de extração: {str(e)}")
+    
+    def _evict_cache(self):
+        """Remove as entradas menos usadas até o cache caber no limite configurado"""
+        cache_files = sorted(
+            Path(self.config["cache_dir"]).glob("*.parquet"),
+            key=lambda f: f.stat().st_mtime
+        )
+        total_bytes = sum(f.stat().st_size for f in cache_files)
+        
+        while cache_files and total_bytes > self.config["cache_max_bytes"]:
+            oldest = cache_files.pop(0)
+            total_bytes -= oldest.stat().st_size
+            oldest.unlink()
+            logging.info(f"Entrada de cache removida: {oldest}")
+    
+    def clear_cache(self):
+        """Invalida todo o cache de extração"""
+        cache_dir = Path(self.config["cache_dir"])
+        for cache_file in cache_dir.glob("*.parquet"):
+            cache_file.unlink()
+        logging.info(f"Cache de extração limpo: {cache_dir}")
+    
+    def extract_chunks(self, chunk_size=None):
+        """Extração em blocos - gera DataFrames com no máximo chunk_size linhas"""
+        chunk_size = chunk_size or self.config["chunk_size"]
+        
+        logging.info(f"Iniciando EXTRAÇÃO em blocos de {chunk_size} registros...")
+        
+        if self.config["sql_source"]["url"]:
+            yield from self._extract_sql_chunks(chunk_size)
+            return
+        
+        for input_file in self.resolve_input_files():
+            yield from self._extract_file_chunks(input_file, chunk_size)
+    
+    def _extract_sql_chunks(self, chunk_size):
+        """
+        Gera blocos de uma consulta SQL sem materializar o resultado inteiro.
+        
+        stream_results usa cursor no servidor quando o driver suporta
+        (psycopg2, pymysql); no SQLite as linhas já são lidas sob demanda.
+        O parâmetro :watermark recebe a marca d'água incremental, se existir.
+        """
+        settings = self.config["sql_source"]
+        engine = _sql_engine(settings["url"], self.config["sql_output"]["pool_size"])
+        params = self._sql_source_params()
+        
+        with engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, max_row_buffer=chunk_size
+            ).execute(sa.text(settings["query"]), params)
+            columns = list(result.keys())
+            
+            empty = True
+            for partition in result.partitions(chunk_size):
+                empty = False
+                yield pd.DataFrame(partition, columns=columns)
+            
+            # Mantém o esquema mesmo sem registros novos
+            if empty:
+                yield pd.DataFrame(columns=columns)
+    
+    def _sql_source_params(self):
+        """Parâmetros da consulta; :watermark vem da última execução incremental"""
+        settings = self.config["sql_source"]
+        params = dict(settings["params"])
+        
+        if ':watermark' in settings["query"] and 'watermark' not in params:
+            watermark = self._incremental_state().load_watermark() if self.config["incremental"] else None
+            params['watermark'] = watermark['max_data'] if watermark else settings["initial_watermark"]
+            logging.info(f"Extração SQL a partir da marca d'água: {params['watermark']}")
+        
+        return params
+    
+    def _extract_file_chunks(self, input_file, chunk_size):
+        """Gera os blocos de um único arquivo de entrada"""
+        usecols = self._needed_columns()
+        schema = self._get_read_schema(input_file)
+        
+        # CSV: leitor em blocos do próprio pandas
+        if input_file.lower().endswith('.csv'):
+            yield from read_csv(input_file, usecols=usecols, schema=schema, chunksize=chunk_size)
+            return
+        
+        # Excel: iteração somente leitura do openpyxl, sem carregar a planilha inteira
+        yield from iter_excel_chunks(input_file, self.config["sheet_name"], chunk_size, usecols, schema)
+    
+    @_metered('validate', rows_in='data', rows_out='data')
     def validate_data(self):
         """Validação inicial dos dados"""
         try:
@@ -95,18 +1153,25 @@ class ETLProcessor:
             if null_counts.sum() > 0:
                 logging.warning(f"Valores nulos encontrados:\n{null_counts[null_counts > 0]}")
             
-            # Validar valores numéricos
-            if "Valor" in self.data.columns:
-                valor_min = self.config["validation_rules"]["valor_min"]
-                valor_max = self.config["validation_rules"]["valor_max"]
-                
-                invalid_values = self.data[
-                    (self.data["Valor"] < valor_min) | 
-                    (self.data["Valor"] > valor_max)
-                ]
-                
-                if len(invalid_values) > 0:
-                    logging.warning(f"Valores fora do intervalo válido: {len(invalid_values)} registros")
+            # Regras declarativas avaliadas em uma única passada vetorizada
+            rule_names, invalid = self.evaluate_validation_rules(self.data)
+            violation_counts = dict(zip(rule_names, invalid.sum(axis=1).tolist()))
+            rejected = invalid.any(axis=0)
+            
+            self.validation_report = {
+                'total_records': len(self.data),
+                'rejected_records': int(rejected.sum()),
+                'violations': violation_counts
+            }
+            
+            for rule_name, count in violation_counts.items():
+                if count > 0:
+                    logging.warning(f"Regra '{rule_name}' violada por {count} registros")
+            
+            if rejected.any() and self.config["validation_rules"].get("reject_invalid", True):
+                self._write_quarantine(self.data[rejected], rule_names, invalid[:, rejected])
+                self.data = self.data[~rejected]
+                logging.warning(f"{int(rejected.sum())} registros enviados para quarentena: {self.config['quarantine_file']}")
             
             logging.info("Validação concluída com sucesso")
             return True
@@ -115,28 +1180,129 @@ class ETLProcessor:
             logging.error(f"Erro na validação: {str(e)}")
             return False
     
+    def compile_validation_rules(self):
+        """Compila validation_rules em uma lista de (nome, função que devolve máscara de inválidos)"""
+        rules = self.config["validation_rules"]
+        compiled = []
+        
+        for col in rules.get("not_null", []):
+            compiled.append((f"not_null:{col}", lambda df, col=col: df[col].isna().to_numpy()))
+        
+        # valor_min/valor_max permanecem como atalho para a faixa de Valor
+        ranges = {"Valor": {"min": rules.get("valor_min"), "max": rules.get("valor_max")}}
+        ranges.update(rules.get("ranges", {}))
+        for col, bounds in ranges.items():
+            compiled.append((f"range:{col}", lambda df, col=col, bounds=bounds: _range_mask(df[col], bounds)))
+        
+        for col, allowed in rules.get("enums", {}).items():
+            allowed_folded = {str(value).casefold() for value in allowed}
+            compiled.append((
+                f"enum:{col}",
+                lambda df, col=col, allowed=allowed_folded: _unique_values_mask(
+                    df[col], lambda uniques: ~uniques.astype(str).str.casefold().isin(allowed)
+                )
+            ))
+        
+        for col, pattern in rules.get("patterns", {}).items():
+            regex = re.compile(pattern)
+            compiled.append((
+                f"pattern:{col}",
+                lambda df, col=col, regex=regex: _unique_values_mask(
+                    df[col], lambda uniques: ~uniques.astype(str).str.match(regex)
+                )
+            ))
+        
+        for rule in rules.get("cross_column", []):
+            compiled.append((
+                f"cross:{rule['name']}",
+                lambda df, expr=rule["expr"]: ~np.asarray(df.eval(expr), dtype=bool)
+            ))
+        
+        return compiled
+    
+    def evaluate_validation_rules(self, df):
+        """
+        Avalia todas as regras e devolve (nomes, matriz booleana regras x registros).
+        
+        Regras sobre colunas ausentes no DataFrame são ignoradas.
+        """
+        rule_names = []
+        masks = []
+        
+        for rule_name, rule in self.compile_validation_rules():
+            try:
+                masks.append(rule(df))
+            except KeyError:
+                continue
+            except pd.errors.UndefinedVariableError:
+                continue
+            rule_names.append(rule_name)
+        
+        if not masks:
+            return rule_names, np.zeros((0, len(df)), dtype=bool)
+        
+        return rule_names, np.vstack(masks)
+    
+    def _write_quarantine(self, rejected_rows, rule_names, invalid):
+        """Grava os registros rejeitados com a lista de regras violadas"""
+        violated = np.full(invalid.shape[1], '', dtype=object)
+        for rule_name, mask in zip(rule_names, invalid):
+            violated[mask] = violated[mask] + rule_name + ';'
+        
+        quarantine = rejected_rows.copy()
+        quarantine['Regras_Violadas'] = [value.rstrip(';') for value in violated]
+        
+        quarantine_path = Path(self.config["quarantine_file"])
+        quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # A primeira gravação da execução sobrescreve; blocos seguintes anexam
+        quarantine.to_csv(
+            quarantine_path, index=False,
+            mode='a' if self._quarantine_started else 'w',
+            header=not self._quarantine_started,
+            encoding='utf-8' if self._quarantine_started else 'utf-8-sig'
+        )
+        self._quarantine_started = True
+    
+    @_metered('transform', rows_in='data')
     def transform(self):
         """Fase de Transformação - Limpa e processa os dados"""
         try:
             logging.info("Iniciando fase de TRANSFORMAÇÃO...")
             
-            # Criar cópia dos dados para transformação
-            self.processed_data = self.data.copy()
-            
-            # 1. Limpeza de dados
-            self._clean_data()
-            
-            # 2. Conversão de tipos
-            self._convert_data_types()
-            
-            # 3. Criação de colunas derivadas
-            self._create_derived_columns()
-            
-            # 4. Agregações e cálculos
-            self._calculate_aggregations()
-            
-            # 5. Padronização de categorias
-            self._standardize_categories()
+            # Com Copy-on-Write a cópia é preguiçosa: colunas só são duplicadas ao mudar
+            low_copy = self.config["low_copy_transform"]
+            enable_cow = low_copy and not _copy_on_write_enabled()
+            with pd.option_context('mode.copy_on_write', True) if enable_cow else contextlib.nullcontext():
+                # Criar cópia dos dados para transformação
+                self.processed_data = self.data.copy(deep=not low_copy)
+                self.invalidate_aggregations()
+                
+                # 1. Limpeza de dados
+                self._clean_data()
+                
+                # 2. Conversão de tipos
+                self._convert_data_types()
+                
+                # 3. Padronização de categorias (antes de agrupar por Departamento,
+                # para que variantes fundidas formem um único grupo)
+                self._standardize_categories()
+                self.invalidate_aggregations()
+                
+                if self._parallel_transform_enabled():
+                    # 4-5. Colunas derivadas e agregações por partição de Departamento
+                    self._transform_partitions_parallel()
+                else:
+                    # 4. Criação de colunas derivadas
+                    self._create_derived_columns()
+                    
+                    # 5. Agregações e cálculos
+                    self._calculate_aggregations()
+                
+                # 6. Tipos compactos para as colunas derivadas
+                if self.config["optimize_dtypes"]:
+                    derived_columns = [col for col in self.processed_data.columns if col not in self.data.columns]
+                    self._optimize_dtypes(derived_columns)
             
             logging.info("Transformação concluída com sucesso")
             return True
@@ -145,110 +1311,265 @@ class ETLProcessor:
             logging.error(f"Erro na transformação: {str(e)}")
             return False
     
+    @_metered('transform.clean_data')
     def _clean_data(self):
         """Limpeza dos dados"""
         logging.info("Executando limpeza de dados...")
         
-        # Remover duplicatas
-        initial_count = len(self.processed_data)
-        self.processed_data = self.processed_data.drop_duplicates()
-        removed_duplicates = initial_count - len(self.processed_data)
-        
-        if removed_duplicates > 0:
-            logging.info(f"Removidas {removed_duplicates} duplicatas")
+        # Remover duplicatas (no lote, ou também entre execuções pelo índice persistente)
+        if self.dedup_index is not None:
+            self.processed_data, repeated, already_loaded = self.dedup_index.filter_new(self.processed_data)
+            self.processed_data = self.processed_data.reset_index(drop=True)
+            if repeated or already_loaded:
+                logging.info(f"Removidas {repeated + already_loaded} duplicatas ({already_loaded} já carregadas em execuções anteriores)")
+        else:
+            # Sem duplicatas, nenhuma coluna é copiada (apenas o índice é refeito)
+            duplicated = _duplicated_rows(self.processed_data)
+            removed_duplicates = int(duplicated.sum())
+            if removed_duplicates > 0:
+                self.processed_data = self.processed_data[~duplicated].reset_index(drop=True)
+                logging.info(f"Removidas {removed_duplicates} duplicatas")
+            else:
+                self.processed_data = self.processed_data.reset_index(drop=True)
         
-        # Tratar valores nulos
+        # Tratar nulos e limpar strings em uma única atribuição por coluna
         for col in self.processed_data.columns:
-            if self.processed_data[col].dtype == 'object':
-                self.processed_data[col] = self.processed_data[col].fillna('Não Informado')
-            elif self.processed_data[col].dtype in ['int64', 'float64']:
-                self.processed_data[col] = self.processed_data[col].fillna(0)
-        
-        # Limpar strings
-        string_columns = self.processed_data.select_dtypes(include=['object']).columns
-        for col in string_columns:
-            self.processed_data[col] = self.processed_data[col].astype(str).str.strip()
+            series = self.processed_data[col]
+            if series.dtype == 'object' or isinstance(series.dtype, pd.StringDtype):
+                if series.hasnans:
+                    series = series.fillna('Não Informado')
+                self.processed_data[col] = series.astype(str).str.strip()
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                self.processed_data[col] = _clean_categorical(series, 'Não Informado')
+            elif series.dtype in ['int64', 'float64'] and series.hasnans:
+                self.processed_data[col] = series.fillna(0)
     
+    @_metered('transform.convert_data_types')
     def _convert_data_types(self):
         """Conversão de tipos de dados"""
         logging.info("Convertendo tipos de dados...")
         
-        # Converter datas
+        # Converter datas (colunas já convertidas não são copiadas de novo)
         for col in self.config["date_columns"]:
-            if col in self.processed_data.columns:
+            if col in self.processed_data.columns and not pd.api.types.is_datetime64_any_dtype(self.processed_data[col]):
                 self.processed_data[col] = pd.to_datetime(self.processed_data[col])
         
         # Converter numéricos
         for col in self.config["numeric_columns"]:
-            if col in self.processed_data.columns:
+            if col in self.processed_data.columns and not pd.api.types.is_numeric_dtype(self.processed_data[col]):
                 self.processed_data[col] = pd.to_numeric(self.processed_data[col], errors='coerce')
         
         # Converter categóricos
         for col in self.config["categorical_columns"]:
             if col in self.processed_data.columns:
                 self.processed_data[col] = self.processed_data[col].astype('category')
+        
+        # Plano automático de tipos para as demais colunas
+        if self.config["optimize_dtypes"]:
+            self._optimize_dtypes(list(self.processed_data.columns))
     
+    def _plan_dtypes(self, df, columns):
+        """
+        Define o menor tipo sem perda para cada coluna.
+        
+        Strings com poucos valores distintos viram category; inteiros e floats
+        são reduzidos apenas quando todos os valores cabem no tipo menor.
+        Medidas (numeric_columns) continuam em float64: somas e agrupamentos
+        acumulam no tipo da coluna e perderiam precisão em float32.
+        """
+        plan = {}
+        
+        for col in columns:
+            series = df[col]
+            
+            if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+                continue
+            
+            if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    continue
+                if len(series) and series.nunique(dropna=True) / len(series) <= self.config["category_max_ratio"]:
+                    plan[col] = 'category'
+                elif self.config["arrow_strings"]:
+                    plan[col] = 'string[pyarrow]'
+                continue
+            
+            # Apenas tipos numéricos NumPy; tipos anuláveis (Int/UInt) são mantidos
+            if not isinstance(series.dtype, np.dtype):
+                continue
+            
+            # Verificações sem cópias da coluna inteira (mínimo/máximo e blocos)
+            if pd.api.types.is_integer_dtype(series):
+                dtype = _smallest_int_dtype(series.to_numpy())
+                if dtype != series.dtype:
+                    plan[col] = dtype
+            
+            elif pd.api.types.is_float_dtype(series) and series.dtype != np.float32 and col not in self.config["numeric_columns"]:
+                if _fits_float32(series.to_numpy()):
+                    plan[col] = np.float32
+        
+        return plan
+    
+    def _optimize_dtypes(self, columns):
+        """Aplica o plano de tipos e registra a memória antes e depois"""
+        plan = self._plan_dtypes(self.processed_data, columns)
+        if not plan:
+            return
+        
+        planned = list(plan)
+        memory_before = int(self.processed_data[planned].memory_usage(index=False, deep=True).sum())
+        # Uma coluna por vez: a versão antiga é liberada antes da próxima conversão
+        for col, dtype in plan.items():
+            self.processed_data[col] = self.processed_data[col].astype(dtype)
+        memory_after = int(self.processed_data[planned].memory_usage(index=False, deep=True).sum())
+        
+        for col, dtype in plan.items():
+            self.dtype_report[col] = str(self.processed_data[col].dtype)
+        
+        saved = memory_before - memory_after
+        logging.info(
+            f"Plano de tipos aplicado em {len(plan)} colunas: "
+            f"{memory_before / 1024:,.1f} KB -> {memory_after / 1024:,.1f} KB "
+            f"({saved / max(memory_before, 1):.0%} de redução)"
+        )
+    
+    @_metered('transform.create_derived_columns')
     def _create_derived_columns(self):
         """Criação de colunas derivadas"""
         logging.info("Criando colunas derivadas...")
         
         if "Data" in self.processed_data.columns:
-            # Extrair componentes de data
-            self.processed_data['Dia_Semana'] = self.processed_data['Data'].dt.day_name()
-            self.processed_data['Semana_Ano'] = self.processed_data['Data'].dt.isocalendar().week
-            self.processed_data['Dias_Desde_Hoje'] = (datetime.now() - self.processed_data['Data']).dt.days
+            # Componentes de data lidos da dimensão de datas (uma linha por dia)
+            extra_columns = [col for col in self.config["date_dimension"]["columns"] if col not in ('Dia_Semana', 'Semana_Ano')]
+            dimension = self._get_date_dimension().lookup(self.processed_data['Data'], ['Dia_Semana', 'Semana_Ano'] + extra_columns)
+            
+            self.processed_data['Dia_Semana'] = dimension['Dia_Semana']
+            self.processed_data['Semana_Ano'] = dimension['Semana_Ano']
+            self.processed_data['Dias_Desde_Hoje'] = days_since(self.processed_data['Data'])
+            for col in extra_columns:
+                self.processed_data[col] = dimension[col]
         
         if "Valor" in self.processed_data.columns:
             # Categorizar valores
-            self.processed_data['Faixa_Valor'] = pd.cut(
-                self.processed_data['Valor'],
-                bins=[0, 1000, 5000, 15000, float('inf')],
-                labels=['Baixo', 'Médio', 'Alto', 'Muito Alto']
-            )
+            self.processed_data['Faixa_Valor'] = _value_bands(self.processed_data['Valor'])
             
             # Calcular percentis
             self.processed_data['Percentil_Valor'] = self.processed_data['Valor'].rank(pct=True)
     
+    def _get_date_dimension(self):
+        """Dimensão de datas do processador (criada na primeira consulta)"""
+        if self.date_dimension is None:
+            settings = self.config["date_dimension"]
+            self.date_dimension = DateDimension(settings["fiscal_year_start_month"], settings["holidays"])
+        return self.date_dimension
+    
+    @_metered('transform.calculate_aggregations')
     def _calculate_aggregations(self):
         """Cálculos e agregações"""
         logging.info("Calculando agregações...")
         
-        # Estatísticas por departamento
-        dept_stats = self.processed_data.groupby('Departamento')['Valor'].agg([
-            'count', 'sum', 'mean', 'std', 'min', 'max'
-        ]).round(2)
+        # Ranking por valor (calculado antes das colunas Dept_* para que seus
+        # temporários não se somem a elas no pico de memória)
+        ranking = self.processed_data['Valor'].rank(method='dense', ascending=False)
+        
+        # Estatísticas por departamento (memoizadas e reutilizadas na carga)
+        dept_stats = self.aggregate(['Departamento'], 'Valor', _DEPT_STAT_FUNCS).round(2)
         
-        # Merge com dados principais
+        # Difundir as estatísticas para as linhas sem o merge (que recria o DataFrame)
         dept_stats.columns = [f'Dept_{col}' for col in dept_stats.columns]
-        self.processed_data = self.processed_data.merge(
-            dept_stats, 
-            left_on='Departamento', 
-            right_index=True, 
-            how='left'
-        )
+        for col, values in _broadcast_group_stats(self.processed_data['Departamento'], dept_stats):
+            self.processed_data[col] = values
         
-        # Ranking por valor
-        self.processed_data['Ranking_Valor'] = self.processed_data['Valor'].rank(
-            method='dense', ascending=False
-        )
+        self.processed_data['Ranking_Valor'] = ranking
+    
+    def _parallel_transform_enabled(self):
+        """Transformação particionada: habilitada e com volume mínimo"""
+        settings = self.config["parallel_transform"]
+        if not settings["enabled"] or len(self.processed_data) < settings["min_rows"]:
+            return False
+        return {'Departamento', 'Valor'}.issubset(self.processed_data.columns)
     
+    @_metered('transform.parallel_partitions')
+    def _transform_partitions_parallel(self):
+        """
+        Colunas derivadas e Dept_* calculadas por partição de Departamento em processos.
+        
+        As linhas são distribuídas pelo hash do departamento, de modo que cada
+        departamento fica inteiro em uma partição. Percentil_Valor e Ranking_Valor
+        dependem do conjunto inteiro e são calculados depois, em uma única passada.
+        """
+        df = self.processed_data
+        settings = self.config["parallel_transform"]
+        departamento = df['Departamento']
+        
+        if isinstance(departamento.dtype, pd.CategoricalDtype):
+            categories = departamento.cat.categories.to_numpy(dtype=object)
+            category_hashes = pd.util.hash_array(categories) if len(categories) else np.empty(0, dtype=np.uint64)
+            codes = departamento.cat.codes.to_numpy()
+            hashes = np.where(codes >= 0, category_hashes[np.maximum(codes, 0)], 0)
+        else:
+            hashes = pd.util.hash_pandas_object(departamento, index=False).to_numpy()
+        
+        partitions = max(min(settings["partitions"] or self.config["max_workers"] or os.cpu_count() or 1, departamento.nunique()), 1)
+        partition_ids = hashes % np.uint64(partitions)
+        logging.info(f"Transformação paralela em {partitions} partições de Departamento...")
+        
+        date_settings = self.config["date_dimension"]
+        worker_settings = {
+            'extra_date_columns': [col for col in date_settings["columns"] if col not in ('Dia_Semana', 'Semana_Ano')],
+            'fiscal_year_start_month': date_settings["fiscal_year_start_month"],
+            'holidays': date_settings["holidays"],
+            'reference': pd.Timestamp.now()
+        }
+        columns = [col for col in ('Data', 'Valor', 'Departamento') if col in df.columns]
+        
+        with tempfile.TemporaryDirectory(prefix='etl_particoes_') as temp_dir, \
+                ProcessPoolExecutor(max_workers=partitions) as pool:
+            futures = []
+            for partition in range(partitions):
+                positions = np.flatnonzero(partition_ids == partition)
+                if len(positions) == 0:
+                    continue
+                input_path = Path(temp_dir) / f"entrada_{partition}.arrow"
+                write_arrow_file(df[columns].iloc[positions].set_axis(positions), input_path)
+                futures.append(pool.submit(
+                    _transform_partition, str(input_path),
+                    str(Path(temp_dir) / f"saida_{partition}.arrow"), worker_settings
+                ))
+            
+            results = pd.concat([read_arrow_file(future.result()) for future in futures]).sort_index()
+        
+        # Colunas globais em uma passada vetorizada sobre todos os valores
+        ranking, percentil = self._global_value_ranks(df['Valor'].to_numpy(dtype=float))
+        
+        # Mesma ordem de colunas da transformação sequencial
+        dept_columns = [col for col in results.columns if col.startswith('Dept_')]
+        for col in results.columns.difference(dept_columns, sort=False):
+            self.processed_data[col] = results[col].set_axis(df.index)
+        self.processed_data['Percentil_Valor'] = percentil
+        for col in dept_columns:
+            self.processed_data[col] = results[col].to_numpy()
+        self.processed_data['Ranking_Valor'] = ranking
+    
+    @_metered('transform.standardize_categories')
     def _standardize_categories(self):
-        """Padronização de categorias"""
+        """Padronização de categorias (acentos, caixa, espaços e sinônimos)"""
         logging.info("Padronizando categorias...")
         
-        # Padronizar status
-        status_mapping = {
-            'aprovado': 'Aprovado',
-            'APROVADO': 'Aprovado',
-            'pendente': 'Pendente',
-            'PENDENTE': 'Pendente',
-            'rejeitado': 'Rejeitado',
-            'REJEITADO': 'Rejeitado'
-        }
+        settings = self.config["category_normalization"]
+        if self.category_normalizer is None:
+            self.category_normalizer = CategoryNormalizer(settings["synonyms"], settings["cache_file"])
         
-        if 'Status' in self.processed_data.columns:
-            self.processed_data['Status'] = self.processed_data['Status'].replace(status_mapping)
+        for col in settings["columns"]:
+            if col in self.processed_data.columns:
+                self.processed_data[col] = self.category_normalizer.normalize(self.processed_data[col], col)
+        
+        try:
+            self.category_normalizer.save()
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar o mapa de categorias: {str(e)}")
     
+    @_metered('load')
     def load(self):
         """Fase de Carga - Salva dados processados"""
         try:
@@ -258,35 +1579,37 @@ class ETLProcessor:
             output_path = Path(self.config["output_file"])
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Salvar em múltiplas abas
-            with pd.ExcelWriter(self.config["output_file"], engine='openpyxl') as writer:
-                # Dados principais processados
-                self.processed_data.to_excel(writer, sheet_name='Dados_Processados', index=False)
-                
-                # Resumo executivo
-                self._create_executive_summary().to_excel(writer, sheet_name='Resumo_Executivo')
-                
-                # Dados por departamento
-                dept_summary = self.processed_data.groupby('Departamento').agg({
-                    'Valor': ['count', 'sum', 'mean'],
-                    'ID': 'count'
-                }).round(2)
-                dept_summary.to_excel(writer, sheet_name='Resumo_Departamento')
-                
-                # Dados mensais
-                if 'Data' in self.processed_data.columns:
-                    monthly_summary = self.processed_data.groupby([
-                        self.processed_data['Data'].dt.year,
-                        self.processed_data['Data'].dt.month
-                    ]).agg({
-                        'Valor': ['count', 'sum', 'mean'],
-                        'ID': 'count'
-                    }).round(2)
-                    monthly_summary.to_excel(writer, sheet_name='Resumo_Mensal')
-            
-            # Salvar também em CSV para compatibilidade
             csv_file = self.config["output_file"].replace('.xlsx', '.csv')
-            self.processed_data.to_csv(csv_file, index=False, encoding='utf-8-sig')
+            
+            # Saídas independentes: (função, argumentos)
+            sinks = {
+                'excel': (write_excel_sheets, (
+                    self.config["output_file"], self.config["excel_writer"], self._excel_sheets()
+                )),
+                # Salvar também em CSV para compatibilidade
+                'csv': (write_csv_file, (self.processed_data, csv_file))
+            }
+            
+            # Parquet particionado para consumo no Power BI
+            if self.config["parquet_output"]["enabled"]:
+                sinks['parquet'] = (self._write_parquet_dataset, ())
+            
+            # Modelo estrela (fato com chaves inteiras + dimensões) para o Power BI
+            if self.config["star_schema"]["enabled"]:
+                settings = self.config["star_schema"]
+                sinks['star_schema'] = (write_star_schema, (
+                    settings["path"], settings["format"], settings["compression"], self._star_schema_tables()
+                ))
+            
+            # Banco de dados (upsert em lotes)
+            if self.config["sql_output"]["enabled"]:
+                sinks['sql'] = (write_sql_tables, (self.config["sql_output"], self._sql_tables()))
+            
+            self.sink_report = self._run_sinks(sinks)
+            
+            failed = {name: report['error'] for name, report in self.sink_report.items() if report['error']}
+            if failed:
+                raise RuntimeError(f"Falha ao gravar {len(failed)} saída(s): {failed}")
             
             logging.info(f"Dados salvos com sucesso em: {self.config['output_file']}")
             logging.info(f"Arquivo CSV criado: {csv_file}")
@@ -297,6 +1620,246 @@ class ETLProcessor:
             logging.error(f"Erro na carga: {str(e)}")
             return False
     
+    def _run_sinks(self, sinks):
+        """
+        Grava as saídas em paralelo e coleta o resultado de cada uma.
+        
+        Todas rodam em threads por padrão. Uma saída configurada como 'process' em
+        sink_executors recebe uma cópia serializada dos dados no processo filho (o pico
+        de memória quase dobra), em troca de não disputar o GIL com as demais.
+        """
+        if self.config["parallel_sinks"]:
+            report = self._run_sinks_parallel(sinks)
+        else:
+            report = {name: _run_sink(name, func, args) for name, (func, args) in sinks.items()}
+        
+        for name, result in report.items():
+            if result['error']:
+                logging.error(f"Saída '{name}' falhou: {result['error']}")
+            else:
+                logging.info(f"Saída '{name}' gravada em {result['wall_time_s']:.2f}s")
+        
+        return report
+    
+    def _run_sinks_parallel(self, sinks):
+        """Distribui as saídas entre pools de processos e de threads"""
+        report = {}
+        executors = self.config["sink_executors"]
+        process_sinks = [name for name in sinks if executors.get(name) == 'process']
+        thread_sinks = [name for name in sinks if name not in process_sinks]
+        
+        with contextlib.ExitStack() as stack:
+            futures = {}
+            if process_sinks:
+                pool = stack.enter_context(ProcessPoolExecutor(max_workers=len(process_sinks)))
+                for name in process_sinks:
+                    futures[name] = pool.submit(_run_sink, name, *sinks[name])
+            if thread_sinks:
+                pool = stack.enter_context(ThreadPoolExecutor(max_workers=len(thread_sinks)))
+                for name in thread_sinks:
+                    futures[name] = pool.submit(_run_sink, name, *sinks[name])
+            
+            for name, future in futures.items():
+                try:
+                    report[name] = future.result()
+                except Exception as e:
+                    # Falha do próprio executor (ex.: processo encerrado ou erro de pickle)
+                    report[name] = {'sink': name, 'wall_time_s': None, 'error': str(e)}
+        
+        return report
+    
+    def _excel_sheets(self):
+        """Abas do workbook de saída: (nome, DataFrame, grava índice)"""
+        sheets = [
+            ('Dados_Processados', self.processed_data, False),
+            ('Resumo_Executivo', self._create_executive_summary(), True),
+            ('Resumo_Departamento', self._summary_by(['Departamento']), True)
+        ]
+        
+        if 'Data' in self.processed_data.columns:
+            sheets.append(('Resumo_Mensal', self._summary_by(['Data.year', 'Data.month']), True))
+        
+        return sheets
+    
+    def _sql_tables(self):
+        """Tabelas do banco: (nome, DataFrame, chave de upsert ou None para substituir)"""
+        settings = self.config["sql_output"]
+        tables = [(settings["table"], self.processed_data, settings["key"])]
+        
+        if settings["summary_tables"]:
+            monthly = self._summary_by(['Data.year', 'Data.month'])
+            monthly.index.names = ['Ano', 'Mes']
+            tables += [
+                ('resumo_executivo', self._create_executive_summary(), None),
+                ('resumo_departamento', _flatten_summary(self._summary_by(['Departamento'])), None),
+                ('resumo_mensal', _flatten_summary(monthly), None)
+            ]
+        
+        return tables
+    
+    def _star_schema_tables(self):
+        """
+        Tabelas do modelo estrela: fato_transacoes, dim_<coluna>, dim_data e agg_departamento.
+        
+        O fato troca os textos repetidos por chaves inteiras (1..n, na ordem das
+        categorias) e Data por Data_Key (AAAAMMDD); atributos de calendário e as
+        colunas Dept_* ficam nas tabelas de dimensão e de agregado.
+        """
+        settings = self.config["star_schema"]
+        df = self.processed_data
+        fact = {}
+        tables = {}
+        
+        for col in settings["dimensions"]:
+            if col not in df.columns:
+                continue
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, uniques = df[col].cat.codes.to_numpy(), df[col].cat.categories
+            else:
+                codes, uniques = pd.factorize(df[col], sort=True)
+            
+            key = f"{col}_Key"
+            keys = pd.array(codes.astype(np.int32) + 1, dtype='Int32')
+            keys[codes < 0] = pd.NA
+            fact[key] = keys
+            tables[f"dim_{col.lower()}"] = pd.DataFrame({
+                key: np.arange(1, len(uniques) + 1, dtype=np.int32),
+                col: np.asarray(uniques, dtype=object)
+            })
+        
+        date_columns = []
+        if 'Data' in df.columns:
+            date_dimension = self._get_date_dimension()
+            dim_data = date_dimension.covering(df['Data'].min(), df['Data'].max())
+            
+            fact['Data_Key'] = date_dimension.date_keys(df['Data']).to_numpy()
+            date_columns = [col for col in dim_data.columns if col in df.columns]
+            tables['dim_data'] = dim_data
+        
+        # Medidas e atributos próprios de cada transação
+        dropped = set(settings["dimensions"]) | set(date_columns) | {col for col in df.columns if col.startswith('Dept_')}
+        fact_table = pd.concat([
+            pd.DataFrame(fact, index=df.index),
+            df[[col for col in df.columns if col not in dropped]]
+        ], axis=1)
+        
+        if 'Departamento' in df.columns:
+            dept_stats = self.aggregate(['Departamento'], 'Valor', _DEPT_STAT_FUNCS).round(2)
+            dim_departamento = tables.get('dim_departamento')
+            if dim_departamento is not None:
+                dept_stats = dept_stats.reindex(dim_departamento['Departamento']).reset_index()
+                dept_stats.insert(0, 'Departamento_Key', dim_departamento['Departamento_Key'].to_numpy())
+                tables['agg_departamento'] = dept_stats.drop(columns='Departamento')
+            else:
+                tables['agg_departamento'] = dept_stats.reset_index()
+        
+        return {'fato_transacoes': fact_table, **tables}
+    
+    def _write_parquet_dataset(self):
+        """
+        Grava processed_data como dataset Parquet particionado (Hive: Ano=AAAA/Mes=M).
+        
+        O dataset é regravado a cada carga. Um manifesto JSON (_manifest.json)
+        descreve esquema, partições, linhas e row groups de cada arquivo.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        settings = self.config["parquet_output"]
+        dataset_path = Path(settings["path"])
+        partition_cols = settings["partition_cols"]
+        
+        df = self.processed_data
+        # Ano/Mes derivados de Data quando não existirem como coluna
+        for col, part in (('Ano', 'year'), ('Mes', 'month')):
+            if col in partition_cols and col not in df.columns:
+                df = df.assign(**{col: getattr(df['Data'].dt, part)})
+        
+        if dataset_path.exists():
+            for old_file in dataset_path.rglob('*.parquet'):
+                old_file.unlink()
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            root_path=str(dataset_path),
+            partition_cols=partition_cols,
+            compression=settings["compression"],
+            row_group_size=settings["row_group_size"],
+            existing_data_behavior='delete_matching'
+        )
+        
+        partitions = []
+        for partition_file in sorted(dataset_path.rglob('*.parquet')):
+            metadata = pq.read_metadata(partition_file)
+            partitions.append({
+                'file': partition_file.relative_to(dataset_path).as_posix(),
+                'rows': metadata.num_rows,
+                'row_groups': metadata.num_row_groups,
+                'bytes': partition_file.stat().st_size
+            })
+        
+        manifest = {
+            'created_at': datetime.now().isoformat(),
+            'total_records': len(df),
+            'partition_cols': partition_cols,
+            'compression': settings["compression"],
+            'row_group_size': settings["row_group_size"],
+            'schema': {field.name: str(field.type) for field in table.schema},
+            'partitions': partitions
+        }
+        
+        with open(dataset_path / '_manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        
+        logging.info(f"Dataset Parquet criado: {dataset_path} ({len(partitions)} partições)")
+    
+    def invalidate_aggregations(self):
+        """Marca uma nova versão dos dados processados e descarta agregações antigas"""
+        self.data_version += 1
+        self._aggregation_cache = {}
+    
+    def aggregate(self, keys, measure, funcs):
+        """
+        Agregação memoizada de processed_data por (chaves, medida, versão dos dados).
+        
+        Chaves aceitam partes de data no formato 'Coluna.atributo' (ex.: 'Data.month').
+        Pedidos cujas funções já foram calculadas para as mesmas chaves e medida
+        reutilizam o resultado existente, de modo que cada agregação distinta é
+        calculada uma única vez por versão.
+        """
+        cache_key = (tuple(keys), measure, self.data_version)
+        cached = self._aggregation_cache.get(cache_key)
+        
+        if cached is not None and all(func in cached.columns for func in funcs):
+            logging.debug(f"Agregação reutilizada: {cache_key}")
+            return cached[list(funcs)]
+        
+        missing = [func for func in funcs if cached is None or func not in cached.columns]
+        group_keys = [self._group_key(key) for key in keys]
+        result = self.processed_data.groupby(group_keys, observed=True)[measure].agg(missing)
+        
+        if cached is not None:
+            result = pd.concat([cached, result], axis=1)
+        self._aggregation_cache[cache_key] = result
+        
+        return result[list(funcs)]
+    
+    def _group_key(self, key):
+        """Resolve uma chave de agrupamento (coluna ou parte de data 'Coluna.atributo')"""
+        if '.' in key:
+            col, part = key.split('.', 1)
+            return getattr(self.processed_data[col].dt, part)
+        return key
+    
+    def _summary_by(self, keys):
+        """Resumo (contagem, soma e média de Valor; contagem de ID) a partir das agregações memoizadas"""
+        valor = self.aggregate(keys, 'Valor', ['count', 'sum', 'mean'])
+        ids = self.aggregate(keys, 'ID', ['count'])
+        
+        summary = pd.concat({'Valor': valor, 'ID': ids}, axis=1)
+        return summary.round(2)
+    
     def _create_executive_summary(self):
         """Cria resumo executivo dos dados"""
         summary_data = {
@@ -319,7 +1882,7 @@ class ETLProcessor:
                 f"R$ {self.processed_data['Valor'].mean():,.2f}",
                 f"R$ {self.processed_data['Valor'].max():,.2f}",
                 f"R$ {self.processed_data['Valor'].min():,.2f}",
-                self.processed_data.groupby('Departamento')['Valor'].sum().idxmax(),
+                self.aggregate(['Departamento'], 'Valor', ['sum'])['sum'].idxmax(),
                 self.processed_data['Status'].mode().iloc[0]
             ]
         }
@@ -327,35 +1890,570 @@ class ETLProcessor:
         return pd.DataFrame(summary_data)
     
     def run_etl(self):
+        """Executa o pipeline ETL completo e grava as métricas por etapa"""
+        self.metrics = PipelineMetrics(self.config["trace_memory"])
+        try:
+            try:
+                self.dedup_index = self._open_dedup_index()
+            except Exception as e:
+                logging.error(f"Erro ao abrir o índice de deduplicação: {str(e)}")
+                return False
+            
+            success = self._run_etl()
+            # O índice só registra os hashes depois de uma carga bem-sucedida
+            if success and self.dedup_index is not None:
+                try:
+                    self.dedup_index.save()
+                except Exception as e:
+                    logging.error(f"Erro ao gravar o índice de deduplicação: {str(e)}")
+                    return False
+                logging.info(f"Índice de deduplicação atualizado: {len(self.dedup_index)} registros")
+            return success
+        finally:
+            try:
+                self.metrics.save(self.config["metrics_file"])
+            except Exception as e:
+                logging.warning(f"Não foi possível gravar as métricas: {str(e)}")
+    
+    def _open_dedup_index(self):
+        """Abre o índice persistente de deduplicação, se habilitado"""
+        settings = self.config["dedup_index"]
+        if not settings["enabled"]:
+            return None
+        
+        return DedupIndex(
+            settings["path"],
+            key_columns=settings["key_columns"],
+            bloom_filter=settings["bloom_filter"],
+            expected_items=settings["expected_items"],
+            false_positive_rate=settings["false_positive_rate"]
+        )
+    
+    def _run_etl(self):
         """Executa o pipeline ETL completo"""
         logging.info("=== INICIANDO PIPELINE ETL ===")
+        self._quarantine_started = False
+        
+        # Modo streaming: memória limitada ao tamanho do bloco
+        if self.config["chunk_size"]:
+            return self.run_etl_streaming()
+        
+        # Modo incremental: processa apenas registros novos
+        if self.config["incremental"]:
+            return self.run_etl_incremental()
+        
+        # Retomada a partir do último checkpoint válido (resume_from)
+        start = ETL_STAGES.index(self._resume_stage())
         
         # Extração
+        if start <= 0:
+            if not self.extract():
+                return False
+            self._save_checkpoint('extract')
+        
+        # Validação
+        if start <= 1:
+            if not self.validate_data():
+                return False
+            self._save_checkpoint('validate')
+        
+        # Transformação
+        if start <= 2:
+            if not self.transform():
+                return False
+            self._save_checkpoint('transform')
+        
+        if self.processed_data.empty:
+            logging.info("Nenhum registro novo após a deduplicação - carga ignorada")
+            return True
+        
+        # Carga
+        if not self.load():
+            return False
+        
+        # A carga já foi concluída: falhar na limpeza não invalida a execução
+        try:
+            self._checkpoint_store().clear()
+        except Exception as e:
+            logging.warning(f"Não foi possível remover os checkpoints: {str(e)}")
+        logging.info("=== PIPELINE ETL CONCLUÍDO COM SUCESSO ===")
+        return True
+    
+    def _input_signature(self):
+        """Identifica a entrada atual (arquivos e datas de modificação, ou consulta SQL)"""
+        source = self.config["sql_source"]
+        if source["url"]:
+            return json.dumps([source["url"], source["query"], source["params"]], sort_keys=True, default=str)
+        return json.dumps([list(self._cache_key(f)) for f in self.resolve_input_files()])
+    
+    def _checkpoint_store(self):
+        return CheckpointStore(self.config["checkpoints"]["dir"])
+    
+    def _save_checkpoint(self, stage):
+        """Grava o resultado da etapa como checkpoint (falhas não interrompem o pipeline)"""
+        if not self.config["checkpoints"]["enabled"]:
+            return
+        
+        try:
+            frame = self.processed_data if stage == 'transform' else self.data
+            
+            # Hashes ainda não gravados do índice de deduplicação acompanham a transformação
+            pending_hashes = None
+            if stage == 'transform' and self.dedup_index is not None:
+                pending_hashes = self.dedup_index.pending
+            
+            self._checkpoint_store().save(stage, frame, self._input_signature(), pending_hashes)
+            logging.info(f"Checkpoint '{stage}' gravado: {len(frame)} registros")
+            
+        except Exception as e:
+            logging.warning(f"Checkpoint '{stage}' não gravado: {str(e)}")
+    
+    def _resume_stage(self):
+        """
+        Etapa a partir da qual o pipeline recomeça, carregando o checkpoint anterior.
+        
+        resume_from aceita 'auto' (após o último checkpoint) ou o nome da etapa
+        ('validate', 'transform', 'load'). Sem checkpoint válido para a entrada
+        atual, a execução é completa.
+        """
+        resume_from = self.config["resume_from"]
+        if not resume_from:
+            return 'extract'
+        
+        try:
+            store = self._checkpoint_store()
+            
+            # Apenas checkpoints consecutivos desde a extração são aproveitáveis
+            completed = store.completed_stages(self._input_signature())
+            if completed is None:
+                logging.warning("Nenhum checkpoint válido para a entrada atual - execução completa")
+                return 'extract'
+            
+            start = completed if resume_from == 'auto' else min(ETL_STAGES.index(resume_from), completed)
+            if start == 0:
+                return 'extract'
+            
+            previous = ETL_STAGES[start - 1]
+            frame, pending_hashes = store.load(previous)
+            
+            if previous == 'transform':
+                self.processed_data = frame
+                if self.dedup_index is not None and pending_hashes is not None:
+                    self.dedup_index.restore_pending(pending_hashes)
+            else:
+                self.data = frame
+            
+            logging.info(f"Retomando a partir de '{ETL_STAGES[start]}' (checkpoint '{previous}': {len(frame)} registros)")
+            return ETL_STAGES[start]
+            
+        except Exception as e:
+            logging.warning(f"Não foi possível retomar do checkpoint: {str(e)} - execução completa")
+            return 'extract'
+    
+    def run_etl_streaming(self):
+        """
+        Executa o pipeline bloco a bloco (validação, transformação e carga por bloco).
+        
+        As abas de resumo são calculadas a partir de acumuladores globais. Com
+        streaming_ranks.mode='external' (padrão), os blocos aguardam em disco e são
+        gravados numa segunda passada com Percentil_Valor, Ranking_Valor e Dept_*
+        globais, como no pipeline em lote. Com mode='chunk' não há segunda passada
+        e essas colunas, que dependem do conjunto inteiro, são omitidas.
+        """
+        ranker = None
+        # As saídas só são abertas no primeiro bloco com registros a gravar
+        sinks = None
+        self.stream_totals = None
+        try:
+            self.profile = DataProfile(self.config["profile_exact_duplicates"])
+            totals = None
+            total_rows = 0
+            
+            rank_settings = self.config["streaming_ranks"]
+            if rank_settings["mode"] == 'external':
+                ranker = ExternalRanker(rank_settings["spill_dir"], rank_settings["block_size"])
+            
+            chunks = self.metrics.timed_iter('extract', self.extract_chunks())
+            for chunk_number, chunk in enumerate(chunks, start=1):
+                logging.info(f"Processando bloco {chunk_number} ({len(chunk)} registros)")
+                self.data = chunk
+                
+                if not self.validate_data():
+                    return False
+                if not self.transform():
+                    return False
+                if self.processed_data.empty:
+                    continue
+                
+                totals = self._accumulate_stream_totals(totals)
+                total_rows += len(self.processed_data)
+                
+                if ranker is not None:
+                    self._spill_stream_chunk(ranker, chunk_number)
+                    continue
+                
+                # Sem segunda passada, essas colunas refletiriam apenas o bloco
+                self.processed_data = self.processed_data.drop(columns=[
+                    col for col in self.processed_data.columns
+                    if col.startswith('Dept_') or col in ('Ranking_Valor', 'Percentil_Valor')
+                ])
+                if sinks is None:
+                    sinks = self._open_stream_sinks()
+                self._write_stream_chunk(sinks)
+                self.profile.update(self.processed_data)
+            
+            # Entrada vazia ou apenas registros já carregados: nada a gravar, como no lote
+            if totals is None:
+                logging.info("Nenhum registro novo após a deduplicação - carga ignorada")
+                return True
+            
+            if ranker is not None:
+                sinks = self._open_stream_sinks()
+                self._write_ranked_chunks(ranker, sinks, totals['dept_stats'])
+            
+            self._close_stream_sinks(sinks, totals)
+            self.stream_totals = totals
+            
+            logging.info(f"Streaming concluído: {total_rows} registros processados")
+            logging.info("=== PIPELINE ETL CONCLUÍDO COM SUCESSO ===")
+            return True
+            
+        except Exception as e:
+            logging.error(f"Erro no pipeline em blocos: {str(e)}")
+            return False
+        
+        finally:
+            if ranker is not None:
+                ranker.close()
+            if sinks is not None and not sinks['closed']:
+                self._discard_stream_sinks(sinks)
+    
+    def _spill_stream_chunk(self, ranker, chunk_number):
+        """Guarda o bloco transformado em disco e registra seus valores no ranking global"""
+        ranker.add(self.processed_data['Valor'].to_numpy(dtype=float))
+        self.processed_data.to_parquet(Path(ranker.spill_dir) / f"bloco_{chunk_number:06d}.parquet", index=False)
+    
+    @_metered('global_ranks', rows_in=None, rows_out=None)
+    def _write_ranked_chunks(self, ranker, sinks, dept_stats):
+        """Segunda passada: aplica ranking, percentil e Dept_* globais aos blocos em disco e grava"""
+        ranker.finalize()
+        logging.info(f"Ranking global calculado: {ranker.total} valores, {len(ranker.values)} distintos")
+        dept_columns = _dept_stat_columns(dept_stats)
+        
+        for chunk_file in sorted(Path(ranker.spill_dir).glob("bloco_*.parquet")):
+            self.processed_data = pd.read_parquet(chunk_file)
+            ranking, percentil = ranker.rank(self.processed_data['Valor'].to_numpy(dtype=float))
+            self.processed_data['Percentil_Valor'] = percentil
+            self.processed_data['Ranking_Valor'] = ranking
+            departamento = self.processed_data['Departamento'].astype(str)
+            for col, values in _broadcast_group_stats(departamento, dept_columns):
+                self.processed_data[col] = values
+            
+            self._write_stream_chunk(sinks)
+            self.profile.update(self.processed_data)
+    
+    def run_etl_incremental(self):
+        """
+        Executa o pipeline apenas sobre registros posteriores à marca d'água.
+        
+        Os registros novos são transformados isoladamente e combinados à saída
+        anterior; Dept_*, Valor_Acumulado, Ranking_Valor e Percentil_Valor são
+        atualizados a partir dos acumuladores persistidos na marca d'água.
+        """
+        state = self._incremental_state()
+        watermark = state.load_watermark()
+        
+        if watermark is None or not state.exists():
+            logging.info("Marca d'água inexistente - executando carga completa")
+            if not (self.extract() and self.validate_data() and self.transform() and self.load()):
+                return False
+            self._save_incremental_state(state, dept_stats_from_frame(self.processed_data))
+            logging.info("=== PIPELINE ETL CONCLUÍDO COM SUCESSO ===")
+            return True
+        
         if not self.extract():
             return False
         
-        # Validação
-        if not self.validate_data():
+        try:
+            previous = state.load_previous()
+            self.data, late = select_new_rows(self.data, previous, watermark)
+            if late:
+                logging.info(f"{late} registros atrasados (anteriores à marca d'água) incluídos")
+        except Exception as e:
+            logging.error(f"Erro ao ler estado incremental: {str(e)}")
             return False
         
-        # Transformação
+        if self.data.empty:
+            logging.info("Nenhum registro novo desde a última execução")
+            self.processed_data = previous
+            return True
+        
+        logging.info(f"Registros novos desde {watermark['max_data']}: {len(self.data)}")
+        
+        if not self.validate_data():
+            return False
         if not self.transform():
             return False
         
-        # Carga
+        if self.processed_data.empty:
+            logging.info("Nenhum registro novo após a deduplicação")
+            self.processed_data = previous
+            return True
+        
+        try:
+            dept_stats = self._merge_incremental(previous, watermark)
+        except Exception as e:
+            logging.error(f"Erro ao combinar dados incrementais: {str(e)}")
+            return False
+        
         if not self.load():
             return False
         
+        self._save_incremental_state(state, dept_stats)
         logging.info("=== PIPELINE ETL CONCLUÍDO COM SUCESSO ===")
         return True
     
+    def _incremental_state(self):
+        return IncrementalState(self.config["incremental_state_file"], self.config["watermark_file"])
+    
+    def _save_incremental_state(self, state, dept_stats):
+        """Persiste a saída processada e a nova marca d'água"""
+        watermark = state.save(self.processed_data, dept_stats)
+        logging.info(f"Marca d'água atualizada: {watermark['max_data']} ({watermark['total_records']} registros)")
+    
+    @_metered('merge_incremental')
+    def _merge_incremental(self, previous, watermark):
+        """Combina os registros novos à saída anterior e atualiza os agregados dependentes"""
+        new_rows = self.processed_data
+        departamento = new_rows['Departamento'].astype(str)
+        
+        # Acumuladores combinados pelo algoritmo paralelo de Chan (média/M2)
+        old_stats = pd.DataFrame.from_dict(watermark['dept_stats'], orient='index')
+        dept_stats = _merge_dept_stats(old_stats, dept_stats_from_frame(new_rows))
+        
+        # Valor_Acumulado continua a partir do total anterior de cada departamento
+        new_rows['Valor_Acumulado'] = (
+            departamento.map(old_stats['sum']).fillna(0).astype(float).values
+            + new_rows.groupby(departamento)['Valor'].cumsum().values
+        )
+        
+        combined = pd.concat([previous, new_rows], ignore_index=True)
+        for col in self.config["categorical_columns"] + ['Faixa_Valor']:
+            if col in combined.columns:
+                combined[col] = combined[col].astype('category')
+        
+        # Estatísticas por departamento difundidas a partir dos acumuladores
+        dept_columns = _dept_stat_columns(dept_stats)
+        for col, values in _broadcast_group_stats(combined['Departamento'].astype(str), dept_columns):
+            combined[col] = values
+        
+        # Rankings globais por busca binária sobre os valores ordenados
+        ranking, percentil = self._global_value_ranks(combined['Valor'].to_numpy(dtype=float))
+        combined['Ranking_Valor'] = ranking
+        combined['Percentil_Valor'] = percentil
+        
+        if 'Dias_Desde_Hoje' in combined.columns:
+            combined['Dias_Desde_Hoje'] = (datetime.now() - combined['Data']).dt.days
+        
+        self.processed_data = combined
+        self.invalidate_aggregations()
+        if self.config["optimize_dtypes"]:
+            self._optimize_dtypes(list(combined.columns))
+        return dept_stats
+    
+    def _global_value_ranks(self, values):
+        """Equivalente a rank(method='dense', ascending=False) e rank(pct=True)"""
+        # Uma ordenação; empates são sequências de valores iguais no vetor ordenado
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        
+        new_run = np.ones(len(values), dtype=bool)
+        new_run[1:] = sorted_values[1:] != sorted_values[:-1]
+        run_id = np.cumsum(new_run) - 1
+        run_starts = np.flatnonzero(new_run)
+        run_ends = np.append(run_starts[1:], len(values))
+        
+        percentil = np.empty(len(values))
+        percentil[order] = ((run_starts + 1 + run_ends) / 2 / len(values))[run_id]
+        
+        ranking = np.empty(len(values))
+        ranking[order] = len(run_starts) - run_id
+        return ranking, percentil
+    
+    def _open_stream_sinks(self):
+        """
+        Abre as saídas incrementais (Excel gravado linha a linha e CSV).
+        
+        Os blocos vão para arquivos temporários; as saídas anteriores só são
+        substituídas (os.replace) quando a execução termina.
+        """
+        output_path = Path(self.config["output_file"])
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        csv_file = self.config["output_file"].replace('.xlsx', '.csv')
+        sinks = {
+            'csv_file': csv_file,
+            'temp_excel': _temp_path(self.config["output_file"]),
+            'temp_csv': _temp_path(csv_file),
+            'header': True,
+            'closed': False
+        }
+        
+        # Sobra de uma execução interrompida
+        if os.path.exists(sinks['temp_csv']):
+            os.remove(sinks['temp_csv'])
+        
+        sinks['writer'] = StreamingExcelWriter(sinks['temp_excel'], engine=self.config["excel_writer"])
+        return sinks
+    
+    def _discard_stream_sinks(self, sinks):
+        """Descarta os arquivos temporários de uma execução que falhou"""
+        # Fechar o gravador libera seus arquivos auxiliares antes da remoção
+        try:
+            sinks['writer'].close()
+        except Exception as e:
+            logging.warning(f"Não foi possível fechar o arquivo Excel temporário: {str(e)}")
+        
+        for temp_file in (sinks['temp_excel'], sinks['temp_csv']):
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    
+    @_metered('load')
+    def _write_stream_chunk(self, sinks):
+        """Anexa o bloco transformado às saídas abertas"""
+        sinks['writer'].write_frame('Dados_Processados', self.processed_data, header=sinks['header'])
+        
+        self.processed_data.to_csv(
+            sinks['temp_csv'], mode='a', index=False,
+            header=sinks['header'], encoding='utf-8-sig' if sinks['header'] else 'utf-8'
+        )
+        sinks['header'] = False
+    
+    def _accumulate_stream_totals(self, totals):
+        """Combina as estatísticas do bloco atual com os acumuladores globais"""
+        df = self.processed_data
+        valor = df['Valor']
+        departamento = df['Departamento'].astype(str)
+        
+        chunk_totals = {
+            'records': len(df),
+            'valor_sum': valor.sum(),
+            'valor_min': valor.min(),
+            'valor_max': valor.max(),
+            'data_min': df['Data'].min(),
+            'data_max': df['Data'].max(),
+            'dept': valor.groupby(departamento).agg(['count', 'sum']),
+            'dept_stats': dept_stats_from_frame(df),
+            'monthly': valor.groupby([df['Data'].dt.year, df['Data'].dt.month]).agg(['count', 'sum']),
+            'status': df['Status'].astype(str).value_counts()
+        }
+        
+        if totals is None:
+            return chunk_totals
+        
+        return {
+            'records': totals['records'] + chunk_totals['records'],
+            'valor_sum': totals['valor_sum'] + chunk_totals['valor_sum'],
+            'valor_min': min(totals['valor_min'], chunk_totals['valor_min']),
+            'valor_max': max(totals['valor_max'], chunk_totals['valor_max']),
+            'data_min': min(totals['data_min'], chunk_totals['data_min']),
+            'data_max': max(totals['data_max'], chunk_totals['data_max']),
+            'dept': totals['dept'].add(chunk_totals['dept'], fill_value=0),
+            'dept_stats': _merge_dept_stats(totals['dept_stats'], chunk_totals['dept_stats']),
+            'monthly': totals['monthly'].add(chunk_totals['monthly'], fill_value=0),
+            'status': totals['status'].add(chunk_totals['status'], fill_value=0)
+        }
+    
+    @_metered('load.summaries', rows_in=None, rows_out=None)
+    def _close_stream_sinks(self, sinks, totals):
+        """Grava as abas de resumo a partir dos acumuladores e fecha as saídas"""
+        executive = pd.DataFrame({
+            'Métrica': [
+                'Total de Registros',
+                'Período dos Dados',
+                'Total de Departamentos',
+                'Valor Total',
+                'Valor Médio',
+                'Maior Transação',
+                'Menor Transação',
+                'Departamento com Maior Volume',
+                'Status Mais Comum'
+            ],
+            'Valor': [
+                totals['records'],
+                f"{totals['data_min'].strftime('%Y-%m-%d')} a {totals['data_max'].strftime('%Y-%m-%d')}",
+                len(totals['dept']),
+                f"R$ {totals['valor_sum']:,.2f}",
+                f"R$ {totals['valor_sum'] / totals['records']:,.2f}",
+                f"R$ {totals['valor_max']:,.2f}",
+                f"R$ {totals['valor_min']:,.2f}",
+                totals['dept']['sum'].idxmax(),
+                totals['status'].idxmax()
+            ]
+        })
+        
+        # Mesmo layout das abas do pipeline em lote (com a coluna de índice)
+        summaries = {
+            'Resumo_Executivo': executive,
+            'Resumo_Departamento': self._summary_from_totals(totals['dept']),
+            'Resumo_Mensal': self._summary_from_totals(totals['monthly'])
+        }
+        
+        for sheet_name, summary in summaries.items():
+            sinks['writer'].write_frame(sheet_name, summary, index=True)
+        
+        sinks['writer'].close()
+        os.replace(sinks['temp_excel'], self.config["output_file"])
+        os.replace(sinks['temp_csv'], sinks['csv_file'])
+        sinks['closed'] = True
+        
+        logging.info(f"Dados salvos com sucesso em: {self.config['output_file']}")
+        logging.info(f"Arquivo CSV criado: {sinks['csv_file']}")
+    
+    def _summary_from_totals(self, grouped):
+        """Converte contagens e somas acumuladas no formato de _summary_by"""
+        valor = pd.DataFrame({
+            'count': grouped['count'].astype(int),
+            'sum': grouped['sum'],
+            'mean': grouped['sum'] / grouped['count']
+        })
+        ids = pd.DataFrame({'count': grouped['count'].astype(int)})
+        
+        summary = pd.concat({'Valor': valor, 'ID': ids}, axis=1)
+        return summary.round(2)
+    
     def generate_data_quality_report(self):
-        """Gera relatório de qualidade dos dados"""
+        """
+        Gera relatório de qualidade dos dados.
+        
+        Após uma execução em blocos, ou com quality_report_mode='approx', o relatório
+        vem do perfil combinável (HyperLogLog e sketch de quantis) em vez de
+        describe()/duplicated() sobre o DataFrame inteiro.
+        """
         if self.processed_data is None:
             logging.error("Dados não processados. Execute o ETL primeiro.")
             return None
         
-        quality_report = {
+        if self.profile is None and self.config["quality_report_mode"] == 'approx':
+            self.profile = DataProfile.from_frame(
+                self.processed_data, exact_duplicates=self.config["profile_exact_duplicates"]
+            )
+        
+        if self.profile is not None:
+            quality_report = self.profile.to_report()
+        else:
+            quality_report = self._exact_quality_report()
+        
+        # Salvar relatório
+        with open('data_quality_report.json', 'w', encoding='utf-8') as f:
+            json.dump(quality_report, f, indent=2, ensure_ascii=False, default=str)
+        
+        logging.info("Relatório de qualidade salvo em: data_quality_report.json")
+        return quality_report
+    
+    def _exact_quality_report(self):
+        """Relatório exato sobre o DataFrame processado em memória"""
+        return {
             'total_records': len(self.processed_data),
             'columns': list(self.processed_data.columns),
             'data_types': self.processed_data.dtypes.to_dict(),
@@ -364,18 +2462,29 @@ class ETLProcessor:
             'memory_usage': self.processed_data.memory_usage(deep=True).sum(),
             'numeric_summary': self.processed_data.describe().to_dict()
         }
-        
-        # Salvar relatório
-        with open('data_quality_report.json', 'w', encoding='utf-8') as f:
-            json.dump(quality_report, f, indent=2, ensure_ascii=False, default=str)
-        
-        logging.info("Relatório de qualidade salvo em: data_quality_report.json")
-        return quality_report
 
 # Exemplo de uso
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline ETL de dados financeiros")
+    parser.add_argument("--config", help="Arquivo JSON de configuração")
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache de extração")
+    parser.add_argument("--clear-cache", action="store_true", help="Limpa o cache antes de executar")
+    parser.add_argument("--checkpoints", action="store_true", help="Grava checkpoints após cada etapa")
+    parser.add_argument("--resume-from", choices=['auto', 'validate', 'transform', 'load'],
+                        help="Retoma a partir do último checkpoint ou da etapa indicada")
+    args = parser.parse_args()
+    
     # Criar instância do processador ETL
-    etl = ETLProcessor()
+    etl = ETLProcessor(args.config)
+    
+    if args.no_cache:
+        etl.config["use_cache"] = False
+    if args.clear_cache:
+        etl.clear_cache()
+    if args.checkpoints:
+        etl.config["checkpoints"]["enabled"] = True
+    if args.resume_from:
+        etl.config["resume_from"] = args.resume_from
     
     # Executar pipeline completo
     success = etl.run_etl()
@@ -384,8 +2493,14 @@ if __name__ == "__main__":
         # Gerar relatório de qualidade
         etl.generate_data_quality_report()
         
+        # Em blocos, processed_data guarda apenas o último bloco
+        if etl.config["chunk_size"]:
+            total_records = etl.stream_totals['records'] if etl.stream_totals else 0
+        else:
+            total_records = len(etl.processed_data)
+        
         print("\n=== RESUMO DO PROCESSAMENTO ===")
-        print(f"Registros processados: {len(etl.processed_data)}")
+        print(f"Registros processados: {total_records}")
         print(f"Colunas finais: {len(etl.processed_data.columns)}")
         print(f"Arquivo de saída: {etl.config['output_file']}")
         
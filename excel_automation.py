@@ -5,26 +5,30 @@ Autor: Sistema de Automação de Dados
 Data: 2025
 """
 
-import pandas as pd
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.chart import BarChart, LineChart, PieChart, Reference
 from openpyxl.utils.dataframe import dataframe_to_rows
 import os
+from excel_reader import read_excel
 
 class ExcelAutomation:
     """Classe para automação de Excel"""
     
-    def __init__(self, input_file, output_file):
+    def __init__(self, input_file, output_file, hub=None):
         self.input_file = input_file
         self.output_file = output_file
+        self.hub = hub
         self.workbook = None
         self.data = None
     
     def load_data(self):
         """Carrega dados do arquivo Excel"""
         try:
-            self.data = pd.read_excel(self.input_file, sheet_name='Dados_Principais')
+            if self.hub is not None:
+                self.data = self.hub.get(self.input_file, sheet_name='Dados_Principais')
+            else:
+                self.data = read_excel(self.input_file, sheet_name='Dados_Principais')
             print(f"Dados carregados: {len(self.data)} registros")
             return True
         except Exception as e:
@@ -389,11 +393,12 @@ Sub AtualizarDadosAutomaticamente()
 End Sub
 '''
         
-        # Salvar código VBA em arquivo
-        with open('/home/ubuntu/codigo_vba_automacao.txt', 'w', encoding='utf-8') as f:
+        # Salvar código VBA em arquivo, na mesma pasta do relatório
+        vba_file = os.path.join(os.path.dirname(self.output_file), 'codigo_vba_automacao.txt')
+        with open(vba_file, 'w', encoding='utf-8') as f:
             f.write(vba_code)
         
-        print("Código VBA gerado e salvo em: codigo_vba_automacao.txt")
+        print(f"Código VBA gerado e salvo em: {vba_file}")
         return vba_code
     
     def save_workbook(self):
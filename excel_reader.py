@@ -0,0 +1,337 @@
+"""
+Leitor de Planilhas Excel com Seleção Automática de Engine
+calamine (se instalado), openpyxl somente leitura (valores) ou pandas/openpyxl padrão,
+com projeção de colunas (usecols) e esquema de tipos persistido entre leituras
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+import pandas as pd
+import numpy as np
+import openpyxl
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Ordem de preferência no modo 'auto' (mais rápida primeiro)
+ENGINES = ('calamine', 'openpyxl_values', 'openpyxl')
+
+def available_engines():
+    """Engines utilizáveis neste ambiente, na ordem de preferência"""
+    engines = []
+    try:
+        import python_calamine  # noqa: F401
+        engines.append('calamine')
+    except ImportError:
+        pass
+    return engines + ['openpyxl_values', 'openpyxl']
+
+def read_excel(path, sheet_name=0, engine='auto', usecols=None, dtype=None, schema=None):
+    """
+    Lê uma aba como DataFrame com a engine pedida ou a melhor disponível.
+    
+    usecols lista os nomes das colunas a ler (nomes ausentes no arquivo são
+    ignorados); com schema (ver infer_schema) os tipos vêm do esquema em vez
+    de serem inferidos. Em caso de falha (engine ausente ou arquivo que ela
+    não suporta) a próxima engine da lista é tentada; o último erro é
+    propagado se todas falharem.
+    """
+    if engine != 'auto' and engine not in ENGINES:
+        raise ValueError(f"Engine de leitura desconhecida: {engine} (use 'auto' ou {', '.join(ENGINES)})")
+    candidates = available_engines() if engine == 'auto' else [engine] + [e for e in available_engines() if e != engine]
+    
+    last_error = None
+    for name in candidates:
+        try:
+            return _READERS[name](path, sheet_name, usecols, dtype, schema)
+        except Exception as e:
+            logging.warning(f"Engine '{name}' falhou ao ler {path}: {str(e)} - tentando a próxima")
+            last_error = e
+    
+    raise last_error
+
+def iter_excel_chunks(path, sheet_name, chunk_size, usecols=None, schema=None):
+    """Gera blocos de até chunk_size linhas sem carregar a planilha inteira"""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = _worksheet(workbook, sheet_name).iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        header, positions = _projection(header, usecols)
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield _frame_from_rows(buffer, header, positions, schema)
+                buffer = []
+        
+        if buffer:
+            yield _frame_from_rows(buffer, header, positions, schema)
+    finally:
+        workbook.close()
+
+def read_csv(path, usecols=None, schema=None, chunksize=None):
+    """CSV com a mesma projeção e esquema de tipos de read_excel"""
+    kwargs = {}
+    if usecols is not None:
+        wanted = set(usecols)
+        kwargs['usecols'] = lambda col: col in wanted
+    
+    # Datas são convertidas após a leitura com o formato do esquema
+    # (date_format no read_csv exige pandas 2)
+    dates = {}
+    if schema:
+        specs = {col: spec for col, spec in schema['columns'].items() if usecols is None or col in wanted}
+        dates = {col: spec for col, spec in specs.items() if spec['dtype'].startswith('datetime64')}
+        kwargs['dtype'] = {col: spec['dtype'] for col, spec in specs.items() if col not in dates}
+    
+    if chunksize is not None:
+        return (_parse_dates(chunk, dates) for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs))
+    
+    try:
+        return _parse_dates(pd.read_csv(path, **kwargs), dates)
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Esquema não corresponde a {path}: {str(e)} - tipos serão inferidos")
+        return pd.read_csv(path, usecols=kwargs.get('usecols'))
+
+def infer_schema(df, category_max_ratio=0.5):
+    """
+    Esquema de leitura de um DataFrame: tipo de cada coluna, formato das datas
+    guardadas como texto e categorias das colunas com poucos valores distintos.
+    
+    O resultado é serializável em JSON (save_schema) e pode ser passado às
+    leituras seguintes, que então pulam a inferência de tipos.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) or isinstance(series.dtype, pd.CategoricalDtype):
+            columns[col] = {'dtype': 'category' if isinstance(series.dtype, pd.CategoricalDtype) else str(series.dtype)}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns[col]['categories'] = [str(value) for value in series.cat.categories]
+            continue
+        
+        values = series.dropna()
+        if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            columns[col] = {'dtype': 'object'}
+            continue
+        
+        date_format = _date_format(values)
+        if date_format:
+            columns[col] = {'dtype': 'datetime64[ns]', 'format': date_format}
+        elif len(series) and values.nunique() / len(series) <= category_max_ratio:
+            columns[col] = {'dtype': 'category', 'categories': sorted(values.unique().tolist())}
+        else:
+            columns[col] = {'dtype': str(series.dtype)}
+    
+    return {'version': 1, 'columns': columns}
+
+def apply_schema(df, schema):
+    """Converte para os tipos do esquema as colunas que ainda não os têm (conversões vetorizadas)"""
+    converted = {}
+    for col in df.columns:
+        spec = schema['columns'].get(col)
+        if spec and str(df[col].dtype) != spec['dtype']:
+            converted[col] = _typed_column(df[col], spec).set_axis(df.index)
+    return df.assign(**converted) if converted else df
+
+def save_schema(schema, path):
+    """Grava o esquema em JSON (escrita atômica)"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+def load_schema(path):
+    """Esquema gravado por save_schema, ou None se ausente/ilegível"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        return schema if schema.get('version') == 1 else None
+    except (OSError, ValueError):
+        return None
+
+def benchmark_engines(path, sheet_name=0, repeat=1):
+    """Mede cada engine disponível no arquivo: tempo, linhas/s e MB/s"""
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    results = []
+    
+    for name in available_engines():
+        try:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                df = _READERS[name](path, sheet_name, None, None, None)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results.append({
+                'engine': name,
+                'seconds': round(best, 4),
+                'rows': len(df),
+                'rows_per_s': round(len(df) / best),
+                'mb_per_s': round(size_mb / best, 2),
+                'error': None
+            })
+        except Exception as e:
+            results.append({'engine': name, 'seconds': None, 'rows': None,
+                            'rows_per_s': None, 'mb_per_s': None, 'error': str(e)})
+    
+    return results
+
+def _read_calamine(path, sheet_name, usecols, dtype, schema):
+    return _read_with_pandas(path, sheet_name, 'calamine', usecols, dtype, schema)
+
+def _read_openpyxl(path, sheet_name, usecols, dtype, schema):
+    return _read_with_pandas(path, sheet_name, 'openpyxl', usecols, dtype, schema)
+
+def _read_with_pandas(path, sheet_name, engine, usecols, dtype, schema):
+    """pd.read_excel com projeção por nome; o esquema é aplicado após a leitura"""
+    wanted = None if usecols is None else set(usecols)
+    df = pd.read_excel(path, sheet_name=sheet_name, engine=engine,
+                       usecols=None if wanted is None else (lambda col: col in wanted), dtype=dtype)
+    return apply_schema(df, schema) if schema else df
+
+def _read_openpyxl_values(path, sheet_name, usecols, dtype, schema):
+    """Somente leitura e apenas valores: sem estilos nem objetos de célula"""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = _worksheet(workbook, sheet_name).iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        
+        # Colunas vazias à direita do cabeçalho são descartadas, como no pandas
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+        
+        header, positions = _projection(header[:width], usecols)
+        data = [row for row in rows if any(value is not None for value in row[:width])]
+    finally:
+        workbook.close()
+    
+    df = _frame_from_rows(data, header, positions, schema)
+    if dtype is not None:
+        df = df.astype(dtype)
+    return df
+
+def _projection(header, usecols):
+    """(nomes, posições) das colunas do cabeçalho selecionadas por usecols"""
+    wanted = None if usecols is None else set(usecols)
+    positions = [i for i, col in enumerate(header) if wanted is None or col in wanted]
+    return [header[i] for i in positions], positions
+
+def _frame_from_rows(rows, header, positions, schema=None):
+    """
+    Monta o DataFrame coluna a coluna, só com as posições projetadas.
+    
+    Colunas presentes no esquema são convertidas direto para o tipo gravado;
+    as demais têm o tipo inferido pelo pandas, como em pd.DataFrame(rows).
+    """
+    specs = schema['columns'] if schema else {}
+    columns = {}
+    for col, i in zip(header, positions):
+        values = [row[i] if i < len(row) else None for row in rows]
+        columns[col] = _typed_column(values, specs[col]) if col in specs else pd.Series(values)
+    return pd.DataFrame(columns, columns=header)
+
+def _typed_column(values, spec):
+    """Converte valores (lista ou Series) para o tipo do esquema (inferência se não couber)"""
+    dtype = spec['dtype']
+    try:
+        if dtype.startswith('datetime64'):
+            return pd.Series(pd.to_datetime(values, format=spec.get('format'))).astype(dtype)
+        if dtype == 'category':
+            return _categorical(values, spec.get('categories', []))
+        if dtype in ('str', 'object'):
+            return pd.Series(values, dtype=dtype)
+        
+        # Inteiros e booleanos só se a conversão for sem perda (ex.: centavos em int64)
+        typed = np.asarray(values, dtype=dtype)
+        if typed.dtype.kind in 'iub':
+            raw = np.asarray(values)
+            if raw.dtype == object or not np.array_equal(typed, raw):
+                raise ValueError(f"conversão de {raw.dtype} para {dtype} com perda")
+        return pd.Series(typed)
+    except (ValueError, TypeError) as e:
+        logging.warning(f"Tipo {dtype} do esquema não se aplica: {str(e)} - tipo inferido")
+        return pd.Series(values)
+
+def _categorical(values, categories):
+    """
+    Categórica a partir das categorias conhecidas; valores novos são
+    acrescentados e categorias sem ocorrência são descartadas.
+    """
+    # Busca apenas os valores distintos; nulos ficam com código -1
+    if isinstance(values, list):
+        values = np.asarray(values, dtype=object)
+    value_codes, uniques = pd.factorize(values)
+    uniques = pd.Index(np.asarray(uniques, dtype=object))
+    known = pd.Index(categories, dtype=object)
+    positions = known.get_indexer(uniques)
+    new_values = uniques[positions == -1]
+    if len(new_values):
+        known = pd.Index(sorted(set(known) | set(new_values)), dtype=object)
+        positions = known.get_indexer(uniques)
+    codes = np.append(positions, -1)[value_codes]
+    
+    result = pd.Categorical.from_codes(codes, categories=known.astype(str) if len(known) else known)
+    return pd.Series(result).cat.remove_unused_categories()
+
+def _parse_dates(df, specs):
+    """Converte as colunas de data do esquema (formato gravado, sem inferência)"""
+    for col, spec in specs.items():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=spec.get('format')).astype(spec['dtype'])
+    return df
+
+def _date_format(values, sample_size=100):
+    """Formato das datas guardadas como texto (apenas formatos com dia e mês)"""
+    sample = values.head(sample_size).astype(str)
+    if not len(sample):
+        return None
+    
+    date_format = guess_datetime_format(sample.iloc[0])
+    if not date_format or '%d' not in date_format or '%m' not in date_format:
+        return None
+    if pd.to_datetime(sample, format=date_format, errors='coerce').isna().any():
+        return None
+    return date_format
+
+def _worksheet(workbook, sheet_name):
+    if isinstance(sheet_name, int):
+        return workbook.worksheets[sheet_name]
+    return workbook[sheet_name]
+
+_READERS = {
+    'calamine': _read_calamine,
+    'openpyxl_values': _read_openpyxl_values,
+    'openpyxl': _read_openpyxl
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara as engines de leitura de Excel")
+    parser.add_argument("arquivo", help="Planilha .xlsx a ler")
+    parser.add_argument("--sheet", default=0, help="Nome ou índice da aba")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por engine (melhor tempo)")
+    args = parser.parse_args()
+    
+    sheet = int(args.sheet) if str(args.sheet).isdigit() else args.sheet
+    print(f"{'Engine':<18}{'Tempo (s)':>12}{'Linhas':>10}{'Linhas/s':>12}{'MB/s':>8}")
+    for result in benchmark_engines(args.arquivo, sheet, args.repeat):
+        if result['error']:
+            print(f"{result['engine']:<18}  erro: {result['error']}")
+        else:
+            print(f"{result['engine']:<18}{result['seconds']:>12.3f}{result['rows']:>10}"
+                  f"{result['rows_per_s']:>12}{result['mb_per_s']:>8.2f}")
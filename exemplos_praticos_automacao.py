@@ -12,6 +12,7 @@ import seaborn as sns
 from datetime import datetime, timedelta
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side
+from sqlalchemy import create_engine, text
 from openpyxl.chart import BarChart, LineChart, Reference
 import smtplib
 from email.mime.multipart import MIMEMultipart
@@ -21,6 +22,9 @@ from email import encoders
 import os
 import json
 import logging
+from date_dimension import DateDimension
+from excel_reader import read_excel, infer_schema
+from data_hub import DataHub
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -31,20 +35,35 @@ class RelatorioFinanceiroAutomatizado:
     Demonstra integração completa de ETL, formatação e distribuição
     """
     
-    def __init__(self, dados_origem, config_email=None):
+    def __init__(self, dados_origem, config_email=None, hub=None):
         self.dados_origem = dados_origem
         self.config_email = config_email
+        self.hub = hub
         self.dados_processados = None
         self.relatorio_excel = None
+        self.dimensao_data = DateDimension()
         
     def extrair_dados(self):
         """Extrai dados de múltiplas fontes"""
         try:
             # Simular extração de diferentes fontes
-            if isinstance(self.dados_origem, str) and self.dados_origem.endswith('.xlsx'):
-                self.dados_brutos = pd.read_excel(self.dados_origem)
+            if isinstance(self.dados_origem, str) and self.hub is not None and self.dados_origem.endswith(('.xlsx', '.csv')):
+                self.dados_brutos = self.hub.get(self.dados_origem)
+            elif isinstance(self.dados_origem, str) and self.dados_origem.endswith('.xlsx'):
+                self.dados_brutos = read_excel(self.dados_origem)
             elif isinstance(self.dados_origem, str) and self.dados_origem.endswith('.csv'):
                 self.dados_brutos = pd.read_csv(self.dados_origem)
+            elif isinstance(self.dados_origem, dict) and 'query' in self.dados_origem:
+                # Consulta SQL: {'url': ..., 'query': ..., 'params': {...}}, lida em blocos
+                engine = create_engine(self.dados_origem['url'])
+                with engine.connect() as conexao:
+                    blocos = pd.read_sql(
+                        text(self.dados_origem['query']),
+                        conexao.execution_options(stream_results=True),
+                        params=self.dados_origem.get('params'),
+                        chunksize=self.dados_origem.get('chunksize', 50000)
+                    )
+                    self.dados_brutos = pd.concat(blocos, ignore_index=True)
             else:
                 self.dados_brutos = self.dados_origem
             
@@ -63,9 +82,8 @@ class RelatorioFinanceiroAutomatizado:
             # Converter data se necessário
             if 'Data' in df.columns:
                 df['Data'] = pd.to_datetime(df['Data'])
-                df['Mes'] = df['Data'].dt.month
-                df['Ano'] = df['Data'].dt.year
-                df['Trimestre'] = df['Data'].dt.quarter
+                calendario = self.dimensao_data.lookup(df['Data'], ['Mes', 'Ano', 'Trimestre'])
+                df[['Mes', 'Ano', 'Trimestre']] = calendario
             
             # Categorizar valores
             if 'Valor' in df.columns:
@@ -365,6 +383,9 @@ class MonitorKPIs:
     Demonstra implementação de alertas e dashboards automatizados
     """
     
+    # Colunas usadas nos KPIs (leitura projetada com usecols)
+    COLUNAS = ['Data', 'Departamento', 'Valor', 'Outlier']
+    
     def __init__(self, dados, thresholds):
         self.dados = dados
         self.thresholds = thresholds
@@ -487,8 +508,11 @@ def exemplo_uso_completo():
         arquivo_dados = 'dados_ficticios_1000_linhas.xlsx'
         
         if os.path.exists(arquivo_dados):
+            # Registro compartilhado: a planilha é lida uma vez para relatório e monitor
+            hub = DataHub()
+            
             # Gerar relatório financeiro automatizado
-            relatorio = RelatorioFinanceiroAutomatizado(arquivo_dados, config_email)
+            relatorio = RelatorioFinanceiroAutomatizado(arquivo_dados, config_email, hub=hub)
             sucesso = relatorio.executar_pipeline_completo(
                 'relatorio_financeiro_automatizado.xlsx',
                 # destinatarios_email=['gestor@empresa.com', 'financeiro@empresa.com']
@@ -497,8 +521,10 @@ def exemplo_uso_completo():
             if sucesso:
                 print("✅ Relatório financeiro gerado com sucesso!")
                 
-                # Monitoramento de KPIs
-                dados = pd.read_excel(arquivo_dados)
+                # Monitoramento de KPIs: visão do registro só com as colunas usadas,
+                # convertidas para os tipos inferidos na leitura do relatório
+                esquema = infer_schema(relatorio.dados_brutos)
+                dados = hub.get(arquivo_dados, usecols=MonitorKPIs.COLUNAS, schema=esquema)
                 monitor = MonitorKPIs(dados, thresholds)
                 kpis = monitor.gerar_dashboard_kpis('dashboard_kpis.png')
                 alertas = monitor.verificar_alertas(kpis)
@@ -519,6 +545,60 @@ def exemplo_uso_completo():
     except Exception as e:
         print(f"❌ Erro na execução: {e}")
 
+def _executar_etapa_lote(nome, etapa):
+    """Executa uma etapa do lote diário; exceções e retorno False contam como falha"""
+    try:
+        sucesso = etapa()
+    except Exception as e:
+        logging.error(f"Erro na etapa {nome}: {str(e)}")
+        sucesso = False
+    
+    if sucesso is False:
+        logging.error(f"Lote diário interrompido: falha na etapa {nome}")
+        return False
+    return True
+
+def executar_lote_diario(arquivo_dados='dados_ficticios_1000_linhas.xlsx', thresholds=None):
+    """
+    Lote diário completo: ETL, automação Excel, relatório financeiro e monitor
+    de KPIs sobre o mesmo arquivo, compartilhando um DataHub para que a
+    planilha seja lida uma única vez. Retorna o número de leituras por fonte,
+    ou None se alguma etapa falhar.
+    """
+    from etl_automation import ETLProcessor
+    from excel_automation import ExcelAutomation
+    
+    hub = DataHub()
+    try:
+        etl = ETLProcessor(hub=hub)
+        etl.config["input_file"] = arquivo_dados
+        etl.config["use_cache"] = False
+        if not _executar_etapa_lote("ETL", etl.run_etl):
+            return None
+        
+        automacao = ExcelAutomation(arquivo_dados, 'relatorio_automatizado.xlsx', hub=hub)
+        if not _executar_etapa_lote("automação Excel", automacao.run_automation):
+            return None
+        
+        relatorio = RelatorioFinanceiroAutomatizado(arquivo_dados, hub=hub)
+        if not _executar_etapa_lote("relatório financeiro",
+                                    lambda: relatorio.executar_pipeline_completo('relatorio_financeiro_automatizado.xlsx')):
+            return None
+        
+        def monitorar_kpis():
+            dados = hub.get(arquivo_dados, usecols=MonitorKPIs.COLUNAS, schema=infer_schema(relatorio.dados_brutos))
+            monitor = MonitorKPIs(dados, thresholds or {})
+            monitor.verificar_alertas(monitor.gerar_dashboard_kpis('dashboard_kpis.png'))
+        
+        if not _executar_etapa_lote("monitor de KPIs", monitorar_kpis):
+            return None
+        
+        leituras = {f"{fonte} [{aba}]": total for (fonte, aba), total in hub.loads.items()}
+        logging.info(f"Lote diário concluído - leituras por fonte: {leituras}")
+        return leituras
+    finally:
+        hub.close()
+
 if __name__ == "__main__":
     exemplo_uso_completo()
 
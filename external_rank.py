@@ -0,0 +1,156 @@
+"""
+Ranking Global Fora da Memória
+Ranking denso e percentil exatos por ordenação externa (runs em disco e merge em blocos)
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+class ExternalRanker:
+    """
+    Ranking denso decrescente e percentil (rank(pct=True)) sobre todos os valores,
+    sem manter a coluna inteira em memória.
+    
+    Cada bloco vira um run ordenado de (valor, contagem) em disco; finalize() faz o
+    merge dos runs em blocos e grava a tabela de valores distintos com as contagens
+    acumuladas, lida depois por mapeamento de memória em rank().
+    """
+    
+    def __init__(self, spill_dir=None, block_size=1000000):
+        self.block_size = block_size
+        self.spill_dir = tempfile.mkdtemp(prefix='etl_ranking_', dir=spill_dir)
+        self.runs = []
+        self.total = 0
+        self.values = None
+        self.less = None
+        self.counts = None
+    
+    def add(self, values):
+        """Registra um bloco de valores (nulos são ignorados, como em rank())"""
+        values = np.asarray(values, dtype=float)
+        values = np.sort(values[~np.isnan(values)])
+        if len(values) == 0:
+            return
+        
+        unique_values, counts = _runs(values)
+        prefix = os.path.join(self.spill_dir, f"run_{len(self.runs)}")
+        np.save(f"{prefix}_valores.npy", unique_values)
+        np.save(f"{prefix}_contagens.npy", counts)
+        self.runs.append(prefix)
+        self.total += len(values)
+    
+    def finalize(self):
+        """Merge dos runs na tabela global de valores distintos"""
+        values_path = os.path.join(self.spill_dir, "valores.bin")
+        counts_path = os.path.join(self.spill_dir, "contagens.bin")
+        
+        distinct = 0
+        with open(values_path, 'wb') as values_file, open(counts_path, 'wb') as counts_file:
+            for unique_values, counts in self._merged_blocks():
+                values_file.write(unique_values.tobytes())
+                counts_file.write(counts.tobytes())
+                distinct += len(unique_values)
+        
+        if distinct == 0:
+            self.values = np.empty(0)
+            self.counts = np.empty(0, dtype=np.int64)
+            self.less = np.empty(0, dtype=np.int64)
+            return
+        
+        self.values = np.memmap(values_path, dtype=float, mode='r', shape=(distinct,))
+        self.counts = np.memmap(counts_path, dtype=np.int64, mode='r', shape=(distinct,))
+        
+        # Quantidade de valores estritamente menores que cada valor distinto
+        less_path = os.path.join(self.spill_dir, "menores.bin")
+        self.less = np.memmap(less_path, dtype=np.int64, mode='w+', shape=(distinct,))
+        running = 0
+        for start in range(0, distinct, self.block_size):
+            block = np.asarray(self.counts[start:start + self.block_size])
+            self.less[start:start + len(block)] = running + np.cumsum(block) - block
+            running += int(block.sum())
+        self.less.flush()
+    
+    def rank(self, values):
+        """(Ranking denso decrescente, percentil médio) de cada valor do bloco"""
+        values = np.asarray(values, dtype=float)
+        missing = np.isnan(values)
+        if len(self.values) == 0:
+            return np.full(len(values), np.nan), np.full(len(values), np.nan)
+        
+        positions = np.searchsorted(self.values, np.where(missing, 0.0, values))
+        positions = np.minimum(positions, len(self.values) - 1)
+        
+        less = np.asarray(self.less[positions])
+        less_equal = less + np.asarray(self.counts[positions])
+        percentil = (less + 1 + less_equal) / 2 / self.total
+        ranking = (len(self.values) - positions).astype(float)
+        
+        percentil[missing] = np.nan
+        ranking[missing] = np.nan
+        return ranking, percentil
+    
+    def close(self):
+        """Remove os arquivos temporários"""
+        self.values = self.counts = self.less = None
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+    
+    def _merged_blocks(self):
+        """
+        Merge k-way vetorizado: lê um bloco de cada run e emite tudo o que é menor
+        ou igual ao menor "último valor lido", que já não pode reaparecer adiante.
+        """
+        block = max(self.block_size // max(len(self.runs), 1), 1)
+        sources = [
+            (np.load(f"{prefix}_valores.npy", mmap_mode='r'), np.load(f"{prefix}_contagens.npy", mmap_mode='r'))
+            for prefix in self.runs
+        ]
+        offsets = [0] * len(sources)
+        pending_values = np.empty(0)
+        pending_counts = np.empty(0, dtype=np.int64)
+        
+        while True:
+            loaded_values, loaded_counts, cutoffs = [pending_values], [pending_counts], []
+            for i, (run_values, run_counts) in enumerate(sources):
+                if offsets[i] >= len(run_values):
+                    continue
+                end = min(offsets[i] + block, len(run_values))
+                loaded_values.append(np.asarray(run_values[offsets[i]:end]))
+                loaded_counts.append(np.asarray(run_counts[offsets[i]:end]))
+                if end < len(run_values):
+                    cutoffs.append(run_values[end - 1])
+                offsets[i] = end
+            
+            values = np.concatenate(loaded_values)
+            counts = np.concatenate(loaded_counts)
+            if len(values) == 0:
+                return
+            
+            order = np.argsort(values, kind='stable')
+            values, counts = values[order], counts[order]
+            
+            # Runs esgotados não limitam o corte
+            cutoff = min(cutoffs) if cutoffs else np.inf
+            ready = values <= cutoff
+            unique_values, merged_counts = _runs(values[ready], counts[ready])
+            if len(unique_values):
+                yield unique_values, merged_counts
+            pending_values, pending_counts = values[~ready], counts[~ready]
+            
+            if not cutoffs and len(pending_values) == 0:
+                return
+
+def _runs(sorted_values, weights=None):
+    """Valores distintos de um vetor ordenado e a soma dos pesos (contagens) de cada um"""
+    if len(sorted_values) == 0:
+        return sorted_values, np.empty(0, dtype=np.int64)
+    
+    starts = np.flatnonzero(np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]]))
+    if weights is None:
+        counts = np.diff(np.append(starts, len(sorted_values)))
+    else:
+        counts = np.add.reduceat(weights, starts)
+    return sorted_values[starts], counts.astype(np.int64)
@@ -0,0 +1,78 @@
+"""
+Estado da Carga Incremental
+Marca d'água (Data/ID e acumuladores por departamento) e saída da última execução
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import json
+import os
+from datetime import datetime
+import pandas as pd
+
+def dept_stats_from_frame(df):
+    """Acumuladores por departamento (contagem, soma, média, M2, mínimo, máximo)"""
+    grouped = df.groupby(df['Departamento'].astype(str))['Valor']
+    stats = grouped.agg(['count', 'sum', 'mean', 'min', 'max'])
+    stats['m2'] = grouped.var(ddof=0).fillna(0) * stats['count']
+    return stats
+
+def select_new_rows(data, previous, watermark):
+    """
+    Registros novos (apenas IDs ausentes da saída anterior) e quantos deles são
+    entregas atrasadas, com data até a marca d'água.
+    
+    A marca d'água serve para podar a leitura (predicado :watermark na fonte
+    SQL) e para separar as entregas atrasadas; um ID já carregado nunca entra
+    de novo, mesmo com data posterior à marca.
+    """
+    unseen = ~data['ID'].astype(str).isin(previous['ID'].astype(str))
+    late = unseen & (pd.to_datetime(data['Data']) <= pd.Timestamp(watermark['max_data']))
+    return data[unseen], int(late.sum())
+
+class IncrementalState:
+    """
+    Estado persistido entre execuções incrementais.
+    
+    A saída processada completa fica em Parquet (state_file) e a marca d'água
+    em JSON (watermark_file), com os acumuladores por departamento usados para
+    atualizar Dept_*, Valor_Acumulado e os rankings sem recalcular o histórico.
+    """
+    
+    def __init__(self, state_file, watermark_file):
+        self.state_file = state_file
+        self.watermark_file = watermark_file
+    
+    def load_watermark(self):
+        """Marca d'água da última execução, ou None se ausente"""
+        if not os.path.exists(self.watermark_file):
+            return None
+        with open(self.watermark_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def exists(self):
+        """Indica se há marca d'água e saída anterior para combinar"""
+        return os.path.exists(self.watermark_file) and os.path.exists(self.state_file)
+    
+    def load_previous(self):
+        """Saída processada da última execução"""
+        return pd.read_parquet(self.state_file)
+    
+    def save(self, processed_data, dept_stats):
+        """Persiste a saída processada e a nova marca d'água"""
+        processed_data.to_parquet(self.state_file, index=False)
+        
+        ids = processed_data['ID'].astype(str)
+        watermark = {
+            # Timestamp completo: truncar ao dia reabriria registros do mesmo dia
+            'max_data': str(processed_data['Data'].max()),
+            'id_min': ids.min(),
+            'id_max': ids.max(),
+            'total_records': len(processed_data),
+            'dept_stats': dept_stats.to_dict(orient='index'),
+            'updated_at': datetime.now().isoformat()
+        }
+        
+        with open(self.watermark_file, 'w', encoding='utf-8') as f:
+            json.dump(watermark, f, indent=2, ensure_ascii=False, default=float)
+        return watermark
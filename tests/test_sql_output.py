@@ -0,0 +1,57 @@
+"""
+Teste da Carga em Banco de Dados
+Reexecuções fazem upsert pela chave: a tabela não duplica registros
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import json
+import os
+
+import pandas as pd
+import sqlalchemy as sa
+
+from etl_automation import ETLProcessor, write_sql_tables
+
+DADOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dados_ficticios_1000_linhas.xlsx')
+
+def _processor(tmp_path, sql_url):
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps({
+        "input_file": DADOS,
+        "output_file": str(tmp_path / 'saida' / 'dados.xlsx'),
+        "use_cache": False,
+        "sql_output": {"enabled": True, "url": sql_url, "batch_size": 300},
+        "metrics_file": str(tmp_path / 'metricas.json')
+    }), encoding='utf-8')
+    return ETLProcessor(str(config_file))
+
+def _count(engine, table):
+    with engine.connect() as connection:
+        return connection.execute(sa.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+def test_sql_upsert_rerun_does_not_duplicate_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sql_url = f"sqlite:///{tmp_path / 'dados.db'}"
+    engine = sa.create_engine(sql_url)
+    
+    assert _processor(tmp_path, sql_url).run_etl()
+    assert _count(engine, 'dados_processados') == 1000
+    summary_rows = _count(engine, 'resumo_departamento')
+    
+    etl = _processor(tmp_path, sql_url)
+    assert etl.run_etl()
+    assert _count(engine, 'dados_processados') == 1000
+    assert _count(engine, 'resumo_departamento') == summary_rows
+    
+    # Registro existente é atualizado, não inserido de novo
+    changed = etl.processed_data.head(1).copy()
+    changed['Valor'] = -1.0
+    write_sql_tables(etl.config["sql_output"], [('dados_processados', changed, 'ID')])
+    assert _count(engine, 'dados_processados') == 1000
+    with engine.connect() as connection:
+        valor = connection.execute(
+            sa.text("SELECT Valor FROM dados_processados WHERE ID = :id"), {'id': str(changed['ID'].iloc[0])}
+        ).scalar()
+    assert valor == -1.0
+    engine.dispose()
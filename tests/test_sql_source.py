@@ -0,0 +1,63 @@
+"""
+Teste da Fonte SQL
+Extração em lote e em blocos de um banco SQLite em memória equivale à leitura da planilha
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from etl_automation import ETLProcessor, _sql_engine
+
+DADOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dados_ficticios_1000_linhas.xlsx')
+SQL_URL = 'sqlite://'
+
+def _processor(tmp_path, name, **config):
+    config_file = tmp_path / f'{name}.json'
+    config_file.write_text(json.dumps({
+        "input_file": DADOS,
+        "use_cache": False,
+        "watermark_file": str(tmp_path / 'marca.json'),
+        **config
+    }), encoding='utf-8')
+    return ETLProcessor(str(config_file))
+
+def _sql_processor(tmp_path, **config):
+    # SQLite em memória: a engine compartilhada mantém a mesma conexão por thread
+    source = pd.read_excel(DADOS)
+    source.to_sql('transacoes', _sql_engine(SQL_URL, 1), index=False, if_exists='replace')
+    return _processor(tmp_path, 'sql', sql_source={"url": SQL_URL, "chunk_size": 300}, **config)
+
+def test_sql_extract_matches_excel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    excel = _processor(tmp_path, 'excel')
+    assert excel.extract()
+    
+    sql = _sql_processor(tmp_path)
+    assert sql._sql_source_params() == {'watermark': '1900-01-01'}
+    assert sql.extract()
+    pd.testing.assert_frame_equal(sql.data, excel.data)
+    
+    chunks = list(sql.extract_chunks(300))
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), excel.data)
+
+def test_sql_extract_uses_incremental_watermark(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'marca.json').write_text(json.dumps({"max_data": "2025-01-01"}), encoding='utf-8')
+    excel = _processor(tmp_path, 'excel')
+    assert excel.extract()
+    expected = excel.data[excel.data['Data'] >= '2025-01-01'].reset_index(drop=True)
+    assert 0 < len(expected) < len(excel.data)
+    
+    sql = _sql_processor(tmp_path, incremental=True)
+    assert sql._sql_source_params() == {'watermark': '2025-01-01'}
+    assert sql.extract()
+    pd.testing.assert_frame_equal(sql.data, expected)
+    pd.testing.assert_frame_equal(pd.concat(sql.extract_chunks(300), ignore_index=True), expected)
+    
+    # Sem modo incremental a marca d'água é ignorada
+    assert _sql_processor(tmp_path)._sql_source_params() == {'watermark': '1900-01-01'}
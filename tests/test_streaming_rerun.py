@@ -0,0 +1,59 @@
+"""
+Teste de Reexecução do Pipeline em Blocos
+Reexecuções sem registros novos ou interrompidas preservam as saídas anteriores
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from etl_automation import ETLProcessor
+
+DADOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dados_ficticios_1000_linhas.xlsx')
+
+def _processor(tmp_path, dedup_index=True):
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps({
+        "input_file": DADOS,
+        "output_file": str(tmp_path / 'saida' / 'dados.xlsx'),
+        "use_cache": False,
+        "chunk_size": 300,
+        "dedup_index": {"enabled": dedup_index, "path": str(tmp_path / 'indice.npz')},
+        "metrics_file": str(tmp_path / 'metricas.json')
+    }), encoding='utf-8')
+    return ETLProcessor(str(config_file))
+
+def test_streaming_rerun_with_dedup_index_is_noop(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert _processor(tmp_path).run_etl()
+    csv_file = tmp_path / 'saida' / 'dados.csv'
+    first_run = pd.read_csv(csv_file)
+    assert len(first_run) > 0
+    
+    # Todos os registros já foram carregados: sucesso sem carga, saídas preservadas
+    assert _processor(tmp_path).run_etl()
+    assert (tmp_path / 'saida' / 'dados.xlsx').exists()
+    pd.testing.assert_frame_equal(pd.read_csv(csv_file), first_run)
+
+def test_streaming_failure_keeps_previous_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert _processor(tmp_path, dedup_index=False).run_etl()
+    output_dir = tmp_path / 'saida'
+    previous = {path.name: path.read_bytes() for path in output_dir.iterdir()}
+    
+    # Falha depois do primeiro bloco gravado
+    write_stream_chunk = ETLProcessor._write_stream_chunk
+    calls = []
+    
+    def failing_write(self, sinks):
+        calls.append(1)
+        if len(calls) > 1:
+            raise OSError("disco cheio")
+        return write_stream_chunk(self, sinks)
+    
+    monkeypatch.setattr(ETLProcessor, '_write_stream_chunk', failing_write)
+    assert not _processor(tmp_path, dedup_index=False).run_etl()
+    assert {path.name: path.read_bytes() for path in output_dir.iterdir()} == previous
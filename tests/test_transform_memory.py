@@ -0,0 +1,67 @@
+"""
+Teste de Memória da Transformação
+O pico de memória de transform(), além das colunas criadas, deve ficar abaixo de 1x a entrada
+Autor: Sistema de Automação de Dados
+Data: 2025
+"""
+
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from etl_automation import ETLProcessor
+
+ROWS = 200_000
+
+def _sample_data(rows):
+    """Transações sintéticas com as colunas de dados_ficticios (textos como category)"""
+    rng = np.random.default_rng(0)
+    
+    def labels(prefix, count):
+        return pd.Categorical(rng.choice([f'{prefix} {number}' for number in range(count)], rows))
+    
+    datas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    return pd.DataFrame({
+        'ID': np.arange(rows, dtype='int64'),
+        'Data': datas,
+        'Departamento': labels('Departamento', 10),
+        'Categoria': labels('Categoria', 12),
+        'Tipo_Transacao': labels('Tipo', 2),
+        'Valor': rng.uniform(10, 50000, rows).round(2),
+        'Fornecedor': labels('Fornecedor', 8),
+        'Status': labels('Status', 3),
+        'Descricao': labels('Transação', 1000),
+        'Mes': datas.month.to_numpy(dtype='int64'),
+        'Ano': datas.year.to_numpy(dtype='int64'),
+        'Trimestre': labels('Q', 4),
+        'Responsavel': labels('Funcionário', 50),
+        'Centro_Custo': labels('CC', 100),
+        'Prioridade': labels('Prioridade', 3),
+        'Valor_Acumulado': rng.uniform(0, 1e6, rows).round(2),
+        'Media_Mensal_Dept': rng.uniform(0, 50000, rows)
+    })
+
+def test_transform_peak_below_input_size():
+    etl = ETLProcessor()
+    etl.data = _sample_data(ROWS)
+    input_mb = etl.data.memory_usage(deep=True).sum() / 1024 ** 2
+    
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        assert etl.transform()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    # As colunas derivadas fazem parte do resultado; o restante do pico são
+    # temporários e colunas convertidas. Uma cópia integral do DataFrame ou um
+    # merge passariam de 1x a entrada
+    derived = [col for col in etl.processed_data.columns if col not in etl.data.columns]
+    derived_mb = etl.processed_data[derived].memory_usage(index=False, deep=True).sum() / 1024 ** 2
+    peak_mb = (peak - start) / 1024 ** 2 - derived_mb
+    assert peak_mb <= 1.0 * input_mb, (
+        f"pico de {peak_mb:.1f} MB além das colunas derivadas para entrada de {input_mb:.1f} MB"
+    )
+    assert len(etl.processed_data) == ROWS